@@ -0,0 +1,287 @@
+"""Times each stage of the pipeline on the games in fixtures/. These are
+generated, not recorded: synthetic feeds (gamePks 530000 to 530003) in the
+Stats API's format.
+
+    python benchmarks/bench.py            # compare with baseline.json
+    python benchmarks/bench.py --save     # record a new baseline.json
+
+Each stage is timed on its own, with its input prepared outside the timed
+region, over several rounds that each time every stage of every game once.
+A stage's time is the median of its rounds, and its noise the median
+absolute deviation of the rounds, relative to the median. A stage is
+flagged when its median is more than --threshold slower than its baseline
+plus --noise-factor times the noise of both runs, and still is when timed
+again; flagged stages make the run exit with status 1. Baselines only mean
+something on the machine that recorded them, so record one before changing
+a hot path and compare against it after.
+"""
+
+import argparse
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gd2score.build_game import GameBuilder
+from gd2score.draw_scorecard import BACKENDS, DrawScorecard
+from gd2score.enhance import GameEnhancer
+from gd2score.feed_source import MemorySource
+from gd2score.parse_game import GameParser
+from gd2score.player_registry import PlayerRegistry
+from gd2score.scoring import get_scoring
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+STAGES = ("parse", "enhance", "scoring", "draw", "serialize")
+
+
+def load_fixtures(names=None):
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json"))):
+        name = os.path.basename(path)[: -len(".json")]
+        if names and name not in names:
+            continue
+        with open(path, encoding="utf-8") as f:
+            fixtures[name] = json.load(f)
+    return fixtures
+
+
+def get_atbats(game):
+    return [atbat for inning in game for half in inning for atbat in half]
+
+
+class StageTimer:
+    """Builds the inputs of each stage for one feed and times the stage.
+
+    A stage that changes its input (enhancing adds runners to the game) gets
+    a fresh input every call; the others reuse one."""
+
+    def __init__(self, feed, backend):
+        self.feed = feed
+        self.plays = feed["liveData"]["plays"]["allPlays"]
+        self.parser = GameParser()
+        self.enhancer = GameEnhancer()
+        self.builder = GameBuilder(MemorySource({}), player_registry=PlayerRegistry())
+        self.scorecard = DrawScorecard(backend=backend)
+
+        self.game = self.builder.build_from_feed(feed)
+        self.atbats = get_atbats(self.game)
+        for atbat in self.atbats:
+            atbat.score()  # Drawing shouldn't pay for scoring
+        self.drawing = self.scorecard.draw(self.game)
+
+    def setup(self, stage):
+        if stage == "enhance":
+            game = self.parser.parse(self.plays)
+            self.builder.set_game_data(game, self.feed)
+            return game
+        return None
+
+    def run(self, stage, arg):
+        if stage == "parse":
+            self.parser.parse(self.plays)
+        elif stage == "enhance":
+            self.enhancer.execute(arg)
+        elif stage == "scoring":
+            for atbat in self.atbats:
+                get_scoring(atbat)
+        elif stage == "draw":
+            self.scorecard.draw(self.game)
+        elif stage == "serialize":
+            self.drawing.write(io.StringIO())
+
+    def time(self, stage, min_time):
+        """Returns the time of one call of stage, in seconds, over a round of
+        as many calls as fit in min_time. As in timeit, the garbage collector
+        is off while the round runs."""
+        gc.collect()
+        gc.disable()
+        total = 0.0
+        calls = 0
+        while total < min_time or calls == 0:
+            arg = self.setup(stage)
+            start = time.perf_counter()
+            self.run(stage, arg)
+            total += time.perf_counter() - start
+            calls += 1
+        gc.enable()
+        return total / calls
+
+
+def summarize(per_call):
+    """Returns the median of round times and their noise: the median
+    absolute deviation, relative to the median."""
+    median = statistics.median(per_call)
+    deviation = statistics.median(abs(t - median) for t in per_call)
+    return {"median": median, "noise": deviation / median}
+
+
+def run_benchmarks(fixtures, pairs, backend, rounds, min_time):
+    """Times the (fixture, stage) pairs. Each round times every pair once,
+    so a stretch of load on the machine slows all of them alike instead of
+    the few that happened to run during it."""
+    timers = {name: StageTimer(fixtures[name], backend) for name, _ in pairs}
+    per_call = {pair: [] for pair in pairs}
+    for _ in range(rounds):
+        for name, stage in pairs:
+            per_call[name, stage].append(timers[name].time(stage, min_time))
+    results = {}
+    for (name, stage), times in per_call.items():
+        results.setdefault(name, {})[stage] = summarize(times)
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_limit(result, base, threshold, noise_factor):
+    """Returns the fraction slower than base that result may be before it
+    counts as a regression."""
+    return threshold + noise_factor * (result["noise"] + base["noise"])
+
+
+def find_regressions(results, baseline, threshold, noise_factor):
+    if not baseline:
+        return []
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline["results"].get(name, {}).get(stage)
+            if base and result["median"] / base["median"] - 1 > get_limit(
+                result, base, threshold, noise_factor
+            ):
+                regressions.append((name, stage))
+    return regressions
+
+
+def confirm_regressions(regressions, fixtures, results, backend, rounds, min_time):
+    """Times the regressed stages again and keeps the faster of each one's
+    two results, so a burst of load on the machine doesn't fail the run."""
+    again = run_benchmarks(fixtures, regressions, backend, rounds, min_time)
+    for name, stage in regressions:
+        if again[name][stage]["median"] < results[name][stage]["median"]:
+            results[name][stage] = again[name][stage]
+
+
+def save_baseline(path, results, backend):
+    baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": backend,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(results, baseline, threshold, noise_factor, out=sys.stdout):
+    """Prints a table of results against baseline, with the change each
+    stage is allowed given its noise, and returns the (fixture, stage)
+    pairs that regressed."""
+    regressions = find_regressions(results, baseline, threshold, noise_factor)
+    base_results = baseline["results"] if baseline else {}
+    out.write(
+        "%-18s %-10s %10s %7s %10s %8s %8s\n"
+        % ("game", "stage", "ms", "noise", "base ms", "change", "limit")
+    )
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            seconds = result["median"]
+            noise = result["noise"] * 100
+            base = base_results.get(name, {}).get(stage)
+            if base:
+                change = seconds / base["median"] - 1
+                limit = get_limit(result, base, threshold, noise_factor)
+                flag = "  REGRESSION" if (name, stage) in regressions else ""
+                out.write(
+                    "%-18s %-10s %10.3f %6.1f%% %10.3f %+7.1f%% %7.1f%%%s\n"
+                    % (
+                        name,
+                        stage,
+                        seconds * 1000,
+                        noise,
+                        base["median"] * 1000,
+                        change * 100,
+                        limit * 100,
+                        flag,
+                    )
+                )
+            else:
+                out.write(
+                    "%-18s %-10s %10.3f %6.1f%% %10s %8s %8s\n"
+                    % (name, stage, seconds * 1000, noise, "-", "-", "-")
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--save", action="store_true", help="write the results as the new baseline"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fraction slower than the baseline that counts as a regression, "
+        "on top of the allowance for noise",
+    )
+    parser.add_argument(
+        "--noise-factor",
+        type=float,
+        default=2.0,
+        help="multiple of the noise of both runs added to the threshold",
+    )
+    parser.add_argument("--rounds", type=int, default=25)
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="seconds to spend on each round"
+    )
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="fast")
+    parser.add_argument("--game", action="append", help="only run this fixture")
+    parser.add_argument(
+        "--stage", action="append", choices=STAGES, help="only run this stage"
+    )
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.game)
+    pairs = [(name, stage) for name in fixtures for stage in args.stage or STAGES]
+    results = run_benchmarks(fixtures, pairs, args.backend, args.rounds, args.min_time)
+    if args.save:
+        save_baseline(args.baseline, results, args.backend)
+        report(results, None, args.threshold, args.noise_factor)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get("backend", "fast") != args.backend:
+        baseline = None
+    regressions = find_regressions(results, baseline, args.threshold, args.noise_factor)
+    if regressions:
+        confirm_regressions(
+            regressions, fixtures, results, args.backend, args.rounds, args.min_time
+        )
+    regressions = report(results, baseline, args.threshold, args.noise_factor)
+    if regressions:
+        print(
+            "%d stage(s) regressed by more than %d%% plus their noise"
+            % (len(regressions), args.threshold * 100)
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
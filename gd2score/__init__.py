@@ -1,4 +1,32 @@
 from .draw_scorecard import DrawScorecard
 from .build_game import GameBuilder
+from .feed_cache import FeedCache
+from .layout import Layout
+from .player_registry import PlayerRegistry
+from .feed_source import (
+    DirectorySource,
+    HttpSource,
+    MemorySource,
+    StatsApiSource,
+    TarballSource,
+)
 
-__all__ = ["build_game", "draw_scorecard"]
+__all__ = [
+    "build_game",
+    "draw_scorecard",
+    "feed_cache",
+    "feed_source",
+    "layout",
+    "metrics",
+    "player_registry",
+    "DirectorySource",
+    "DrawScorecard",
+    "FeedCache",
+    "GameBuilder",
+    "HttpSource",
+    "Layout",
+    "MemorySource",
+    "PlayerRegistry",
+    "StatsApiSource",
+    "TarballSource",
+]
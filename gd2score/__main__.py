@@ -1,46 +1,325 @@
-from datetime import datetime, timedelta
+import argparse
+from datetime import datetime
 import logging
+import os
 
-import statsapi
+from .feed_source import DirectorySource, HttpSource, StatsApiSource, TarballSource
+from .logo_store import LogoStore, download_logos
+from .manifest import Manifest, get_renderer_version
+from .metrics import profile
+from .quarantine import Quarantine
+from .render import GameRenderer, SeasonRenderer
+from .schedule_index import ScheduleIndex
+from .season_archive import pack_directory
 
-from .build_game import GameBuilder
-from .draw_scorecard import DrawScorecard
 
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
 
-if __name__ == "__main__":
-    logging.basicConfig(  # filename='parsing.log',
-        format="%(levelname)s:%(message)s", level=logging.INFO
+
+def get_source(args):
+    # Rendering never looks past the fields kept by selective reads
+    if args.source and os.path.isdir(args.source):
+        return DirectorySource(args.source, selective=True, stream=args.stream)
+    elif args.source:
+        return TarballSource(args.source, selective=True, stream=args.stream)
+    elif args.base_url:
+        return HttpSource(args.base_url, selective=True, stream=args.stream)
+    return StatsApiSource(selective=True, stream=args.stream)
+
+
+def render(args):
+    source = get_source(args)
+    cache_dir = None if args.source else args.cache
+    fetcher = None
+    if args.concurrency and not args.source:
+        from .async_fetch import AsyncFeedFetcher
+
+        fetcher = AsyncFeedFetcher(
+            args.base_url or "https://statsapi.mlb.com",
+            concurrency=args.concurrency,
+            rate=args.rate,
+        )
+    draw_options = get_draw_options(args)
+    manifest = get_manifest(args, draw_options)
+    schedule_index = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        schedule_index = ScheduleIndex(source, os.path.join(cache_dir, "schedule.json"))
+    renderer = SeasonRenderer(
+        source,
+        args.out,
+        cache_dir,
+        args.jobs,
+        fetcher,
+        draw_options,
+        schedule_index,
+        args.final_only,
+        manifest,
+        args.metrics,
+        args.memory,
+        args.memory_budget and int(args.memory_budget * 1024 * 1024),
+        args.quarantine and Quarantine(args.quarantine),
+        args.archive,
+        args.enforce_memory_budget,
+    )
+    if args.archive:
+        os.makedirs(args.archive, exist_ok=True)
+    renderer.render(args.start, args.end)
+    write_prometheus(args, renderer)
+
+
+def redraw(args):
+    renderer = SeasonRenderer(
+        None,
+        args.out,
+        jobs=args.jobs,
+        draw_options=get_draw_options(args),
+        metrics_path=args.metrics,
+        memory=args.memory,
+        memory_budget=args.memory_budget and int(args.memory_budget * 1024 * 1024),
+        enforce_budget=args.enforce_memory_budget,
+        archive_dir=args.archive,
+    )
+    renderer.redraw()
+    write_prometheus(args, renderer)
+
+
+def replay(args):
+    quarantine = Quarantine(args.quarantine)
+    draw_options = get_draw_options(args)
+    renderer = SeasonRenderer(
+        quarantine.source(selective=True, stream=args.stream),
+        args.out,
+        jobs=args.jobs,
+        draw_options=draw_options,
+        manifest=get_manifest(args, draw_options),
+        metrics_path=args.metrics,
+        memory=args.memory,
+        memory_budget=args.memory_budget and int(args.memory_budget * 1024 * 1024),
+        enforce_budget=args.enforce_memory_budget,
+        quarantine=quarantine,
+    )
+    renderer.render_games(quarantine.game_ids())
+    write_prometheus(args, renderer)
+
+
+def get_draw_options(args):
+    draw_options = {}
+    if args.compact:
+        draw_options.update(compact=True, precision=args.precision)
+    if args.logos:
+        logos = LogoStore(args.logos, args.logo_mode)
+        draw_options["logos"] = logos
+        if args.logo_mode == "sprite":
+            os.makedirs(args.out, exist_ok=True)
+            logos.write_sprite(os.path.join(args.out, logos.sprite_url))
+    return draw_options
+
+
+def get_manifest(args, draw_options):
+    if args.force:
+        return None
+    os.makedirs(args.out, exist_ok=True)
+    return Manifest(
+        os.path.join(args.out, "manifest.jsonl"), get_renderer_version(draw_options)
     )
 
-    game_builder = GameBuilder()
-    draw_scorecard = DrawScorecard()
 
-    start_date = datetime(2018, 10, 5)
-    for date in [start_date + timedelta(days=x) for x in range(0, 200)]:
-        games = statsapi.schedule(
-            start_date="%d/%d/%d" % (date.month, date.day, date.year)
+def write_prometheus(args, renderer):
+    if args.metrics_prom:
+        with open(args.metrics_prom, "w", encoding="utf-8") as f:
+            f.write(renderer.metrics.to_prometheus())
+
+
+def profile_game(args):
+    renderer = GameRenderer(get_source(args))
+    os.makedirs(args.out, exist_ok=True)
+    _, report = profile(
+        renderer.render, args.game_id, args.out, limit=args.limit, dump_path=args.dump
+    )
+    print(report)
+    print("Stage times:", renderer.metrics.summary())
+
+
+def logos(args):
+    download_logos(args.out)
+
+
+def pack(args):
+    games = pack_directory(args.archive, args.out)
+    logging.info("Packed %d games into %s", games, args.out)
+
+
+def add_stream_argument(parser):
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="decode feeds without holding the whole feed in memory "
+        "(slower; needs ijson)",
+    )
+
+
+def add_batch_arguments(parser, manifest=True):
+    """Adds the options shared by render, replay and redraw. manifest=False
+    leaves out --force, for commands that don't keep a manifest."""
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument("--out", default=".", help="output directory")
+    if manifest:
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="render every game, even if unchanged since the last run",
         )
+    parser.add_argument(
+        "--compact", action="store_true", help="write smaller, minified SVG"
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=2,
+        help="decimals to round coordinates to with --compact",
+    )
+    parser.add_argument(
+        "--logos", help="directory of team logos to embed (see the logos command)"
+    )
+    parser.add_argument(
+        "--logo-mode",
+        choices=("data", "symbol", "sprite"),
+        default="data",
+        help="inline logos as data URIs or symbols, or link a logos.svg sprite",
+    )
+    parser.add_argument(
+        "--metrics", help="append each game's stage timings to this JSON lines file"
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        help="write the batch's stage timings to this file in Prometheus format",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="also measure each stage's memory use, with tracemalloc (slow)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        help="warn about games that peak above this many MB (implies --memory); "
+        "only a warning unless --enforce-memory-budget is given",
+    )
+    parser.add_argument(
+        "--enforce-memory-budget",
+        action="store_true",
+        help="fail games that go over --memory-budget, quarantining them with "
+        "--quarantine, instead of only warning",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gd2score")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser(
+        "render", help="render every game in a date range to SVG"
+    )
+    render_parser.add_argument("--start", type=parse_date, required=True)
+    render_parser.add_argument("--end", type=parse_date, required=True)
+    render_parser.add_argument(
+        "--source", help="directory or tarball of saved <gamePk>.json(.gz) feeds"
+    )
+    render_parser.add_argument(
+        "--base-url", help="Stats API host to use instead of statsapi.mlb.com"
+    )
+    render_parser.add_argument(
+        "--cache", default="feed_cache", help="feed cache directory"
+    )
+    render_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="download up to this many feeds at once ahead of rendering",
+    )
+    render_parser.add_argument(
+        "--rate", type=float, help="maximum Stats API requests per second"
+    )
+    render_parser.add_argument(
+        "--final-only", action="store_true", help="skip games that aren't final"
+    )
+    render_parser.add_argument(
+        "--quarantine",
+        help="quarantine games that fail in this directory and carry on",
+    )
+    render_parser.add_argument(
+        "--archive", help="also save every game built to this directory (see redraw)"
+    )
+    add_stream_argument(render_parser)
+    add_batch_arguments(render_parser)
+    render_parser.set_defaults(func=render)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="render the games in a quarantine directory again"
+    )
+    replay_parser.add_argument(
+        "--quarantine", required=True, help="quarantine directory"
+    )
+    add_stream_argument(replay_parser)
+    add_batch_arguments(replay_parser)
+    replay_parser.set_defaults(func=replay)
+
+    redraw_parser = subparsers.add_parser(
+        "redraw", help="render the games saved by render --archive again"
+    )
+    redraw_parser.add_argument(
+        "--archive",
+        required=True,
+        help="directory of archived games, or a season archive made by pack",
+    )
+    add_batch_arguments(redraw_parser, manifest=False)
+    redraw_parser.set_defaults(func=redraw)
+
+    pack_parser = subparsers.add_parser(
+        "pack", help="pack a directory of archived games into one season archive"
+    )
+    pack_parser.add_argument(
+        "--archive", required=True, help="directory of archived games"
+    )
+    pack_parser.add_argument("--out", required=True, help="season archive to write")
+    pack_parser.set_defaults(func=pack)
 
-        for game_dict in games:
-            logging.info(
-                "Processing %d %s %s vs. %s",
-                game_dict["game_id"],
-                game_dict["game_date"],
-                game_dict["away_name"],
-                game_dict["home_name"],
-            )
-            game = game_builder.build(game_dict["game_id"])
-            drawing = draw_scorecard.draw(game)
-            drawing.saveas("test.svg")
-
-            # for inning in game:
-            #    print(inning)
-            #    for half in inning:
-            #        print(half)
-            #        for atbat in half:
-            #            print(atbat)
-            #            for runner in atbat.mid_pa_runners:
-            #                print(runner, 'mid-pa')
-            #            for runner in atbat.runners:
-            #                print(runner)
-            # input('Done')
+    profile_parser = subparsers.add_parser(
+        "profile", help="render one game under cProfile and report the hot spots"
+    )
+    profile_parser.add_argument("game_id", type=int)
+    profile_parser.add_argument("--out", default=".", help="output directory")
+    profile_parser.add_argument(
+        "--source", help="directory or tarball of saved <gamePk>.json(.gz) feeds"
+    )
+    profile_parser.add_argument(
+        "--base-url", help="Stats API host to use instead of statsapi.mlb.com"
+    )
+    profile_parser.add_argument(
+        "--limit", type=int, default=30, help="number of functions to report"
+    )
+    profile_parser.add_argument(
+        "--dump", help="save the raw profile here, for pstats or snakeviz"
+    )
+    add_stream_argument(profile_parser)
+    profile_parser.set_defaults(func=profile_game)
+
+    logos_parser = subparsers.add_parser(
+        "logos", help="download the team logos for render --logos"
+    )
+    logos_parser.add_argument("--out", default="logos", help="logo directory")
+    logos_parser.set_defaults(func=logos)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(  # filename='parsing.log',
+        format="%(levelname)s:%(message)s", level=logging.INFO
+    )
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+from .feed_reader import loads
+from .feed_source import get_feed_path, get_schedule_path, parse_schedule
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# What a download can fail with: HTTP and connection errors, timeouts and
+# feeds that aren't valid JSON
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+
+class RateLimiter:
+    """Token bucket allowing rate requests per second on average, with bursts
+    of up to burst requests."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFeedFetcher:
+    """Downloads feeds and schedules over a shared pool of keep-alive
+    connections, with at most concurrency requests in flight. Failed
+    requests are retried with exponential backoff.
+
+    Use as an async context manager:
+
+        async with AsyncFeedFetcher(concurrency=64) as fetcher:
+            async for game_id, feed in fetcher.iter_feeds(game_ids):
+                game = game_builder.build_from_feed(feed)
+    """
+
+    def __init__(
+        self,
+        base_url="https://statsapi.mlb.com",
+        concurrency=50,
+        rate=None,
+        retries=3,
+        backoff=0.5,
+        timeout=30,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.concurrency, keepalive_timeout=30
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Accept-Encoding": "gzip"},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def get_feed(self, game_id):
+        return await self.get(get_feed_path(game_id))
+
+    async def schedule(self, start_date, end_date):
+        return parse_schedule(await self.get(get_schedule_path(start_date, end_date)))
+
+    async def iter_feeds(self, game_ids, return_exceptions=False):
+        """Yields (game_id, feed) pairs in the order the downloads finish.
+        Finished feeds are buffered up to concurrency deep, so a slow
+        consumer holds back the downloads instead of piling up feeds.
+
+        A failed download raises its exception, or with return_exceptions
+        is yielded in place of the feed and the other downloads go on. Any
+        other error is always raised."""
+        game_ids = list(game_ids)
+        pending = iter(game_ids)
+        queue = asyncio.Queue(self.concurrency)
+
+        async def fetch():
+            for game_id in pending:
+                try:
+                    await queue.put((game_id, await self.get_feed(game_id)))
+                except FETCH_ERRORS as e:
+                    await queue.put((game_id, e))
+                except Exception as e:
+                    # A bug rather than a failed download: the consumer
+                    # raises it either way instead of waiting for this game
+                    await queue.put((game_id, e))
+                    raise
+
+        workers = [asyncio.create_task(fetch()) for _ in range(self.concurrency)]
+        try:
+            for _ in game_ids:
+                game_id, feed = await queue.get()
+                if isinstance(feed, Exception) and not (
+                    return_exceptions and isinstance(feed, FETCH_ERRORS)
+                ):
+                    raise feed
+                yield game_id, feed
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def get(self, path):
+        url = self.base_url + path
+        for attempt in range(self.retries + 1):
+            async with self.semaphore:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire()
+                try:
+                    async with self.session.get(url) as response:
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            return loads(await response.read())
+                        error = f"HTTP {response.status}"
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    error = repr(e)
+                    if attempt == self.retries:
+                        raise
+            if attempt == self.retries:
+                break
+            delay = self.backoff * 2**attempt * (1 + random.random())
+            logging.warning("Retrying %s in %.1fs after %s", url, delay, error)
+            await asyncio.sleep(delay)
+        raise aiohttp.ClientError(f"Giving up on {url} after {error}")
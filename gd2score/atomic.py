@@ -0,0 +1,25 @@
+"""Writing files that readers never see half written."""
+
+from contextlib import contextmanager, suppress
+import os
+
+
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """Opens a temporary file next to path for writing, and moves it to
+    path once the block finishes. If anything fails, including opening the
+    temporary file, path is left as it was and nothing else is left behind.
+
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    """
+    # The process id keeps processes writing the same path apart
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
@@ -1,28 +1,87 @@
-import statsapi
-
 from .parse_game import GameParser
 from .enhance import GameEnhancer
-from .models import Player
+from .feed_source import StatsApiSource
+from .metrics import active, count, timed
+from .player_registry import default_registry
+
+
+def count_game(game):
+    atbats = runners = 0
+    for inning in game:
+        for half_inning in inning:
+            for atbat in half_inning:
+                atbats += 1
+                runners += len(atbat.runners) + len(atbat.mid_pa_runners)
+    count("atbats", atbats)
+    count("runners", runners)
+    metrics = active()
+    if metrics is not None and metrics.memory:
+        metrics.count_objects(iter_models(game))
+
+
+def score_game(game):
+    """Scores every at-bat, so that a description that can't be scored
+    fails the build instead of whatever first looks at its scoring."""
+    for inning in game:
+        for half_inning in inning:
+            for atbat in half_inning:
+                atbat.score()
+
+
+def iter_models(game):
+    yield game
+    for inning in game:
+        yield inning
+        for half_inning in inning:
+            yield half_inning
+            for atbat in half_inning:
+                yield atbat
+                yield from atbat.mid_pa_runners
+                yield from atbat.runners
+    yield from game.players.values()
 
 
 class GameBuilder:
-    def __init__(self):
+    def __init__(self, source=None, cache=None, player_registry=None):
         self.game_parser = GameParser()
         self.game_enhancer = GameEnhancer()
+        self.source = source or StatsApiSource()
+        self.cache = cache
+        self.player_registry = player_registry or default_registry
 
     def build(self, game_id):
-        feed = statsapi.get("game", {"gamePk": game_id})
-        game = self.game_parser.parse(feed["liveData"]["plays"]["allPlays"])
+        return self.build_from_feed(self.get_feed(game_id))
+
+    def build_from_feed(self, feed):
+        with timed("parse"):
+            game = self.game_parser.parse(feed["liveData"]["plays"]["allPlays"])
+        with timed("game_data"):
+            self.set_game_data(game, feed)
+        with timed("enhance"):
+            self.game_enhancer.execute(game)
+        with timed("scoring"):
+            score_game(game)
+        count_game(game)
+        return game
+
+    def set_game_data(self, game, feed):
+        game.game_pk = feed["gamePk"]
+        game.date = feed["gameData"]["datetime"]["officialDate"]
         game.away = feed["gameData"]["teams"]["away"]["fileCode"]
         game.home = feed["gameData"]["teams"]["home"]["fileCode"]
         game.players = self.parse_players(feed["gameData"]["players"])
         game.link = f"https://statsapi.mlb.com{feed['link']}"
-        self.game_enhancer.execute(game)
-        return game
+
+    def get_feed(self, game_id):
+        with timed("fetch"):
+            if self.cache:
+                feed = self.cache.get(game_id)
+                if feed is not None:
+                    return feed
+            feed = self.source.get_feed(game_id)
+            if self.cache:
+                self.cache.put(game_id, feed)
+            return feed
 
     def parse_players(self, player_dict):
-        players = {0: Player(0, "Held Runner")}
-        for key, player in player_dict.items():
-            id = player["id"]
-            players[id] = Player(id, player["initLastName"])
-        return players
+        return self.player_registry.parse_players(player_dict)
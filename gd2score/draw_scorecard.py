@@ -1,11 +1,11 @@
-from svgwrite import Drawing
-from svgwrite.shapes import Line, Rect
-from svgwrite.text import Text
-from svgwrite.container import Group
-from svgwrite.image import Image
+import svgwrite
 
+from . import svg
 from .logo_lookup import get_logo
 from .draw_runners import DrawRunners
+from .layout import Layout
+from .metrics import count, timed
+from .runner_geometry import get_game_segments
 from .constants import (
     ORIGIN_X,
     ORIGIN_Y,
@@ -25,41 +25,95 @@ from .constants import (
 )
 
 
+# Drawing classes by backend name. Both produce the same markup; the fast
+# one writes it directly instead of going through svgwrite's element tree.
+BACKENDS = {"fast": svg.Drawing, "svgwrite": svgwrite.Drawing}
+
+
 class DrawScorecard:
-    def __init__(self):
-        self.runner_drawer = DrawRunners()
+    def __init__(
+        self, backend="fast", debug=False, compact=False, precision=2, logos=None
+    ):
+        """debug=True validates every element and attribute against the
+        SVG 1.1 full profile, with either backend.
+
+        compact=True (fast backend only) makes much smaller files: out marks
+        are defined once and placed with <use>, numbers are rounded to
+        precision decimals and the markup is minified. Style out marks
+        through inherited properties (such as stroke on .runner), since
+        selectors can't reach into a <use>.
+
+        logos is a LogoStore to take team logos from; by default they are
+        linked from mlbstatic.com."""
+        if compact and backend != "fast":
+            raise ValueError("Compact output needs the fast backend")
+        if logos and logos.mode == "symbol" and backend != "fast":
+            raise ValueError("Symbol logos need the fast backend")
+        self.logos = logos
+        self.runner_drawer = DrawRunners(compact)
+        self.drawing_class = BACKENDS[backend]
+        self.debug = debug
+        self.drawing_options = {"debug": debug, "profile": "full"}
+        if compact:
+            self.drawing_options.update(compact=True, precision=precision)
 
     def draw(self, game):
+        with timed("draw"):
+            self.dwg = self.drawing_class(**self.drawing_options)
+            self.draw_elements(game)
+        return self.dwg
+
+    def draw_to(self, game, fileobj):
+        """Draws game straight into fileobj, writing each element as soon as
+        it is finished instead of building the whole drawing first. Writes
+        the same text as draw(game).write(fileobj), always with the fast
+        backend. Wrap binary streams (gzip files, sockets) in an
+        io.TextIOWrapper."""
+        with timed("draw"):
+            self.dwg = svg.StreamingDrawing(fileobj, **self.drawing_options)
+            self.draw_elements(game)
+            self.dwg.close()
+
+    def draw_elements(self, game):
         self.game = game
         self.players = game.players
-
-        self.dwg = Drawing(debug=True, profile="full")
-
-        self.draw_inning_stripes()
-        self.draw_inning_separators()
-        self.draw_inning_numbers()
-        self.draw_team_boxes()
-        self.draw_game()
+        with timed("layout"):
+            self.layout = Layout(game)
+        with timed("runner_geometry"):
+            self.runner_segments = get_game_segments(game, self.layout)
+        with timed("draw_defs"):
+            self.runner_drawer.draw_defs(self.dwg)
+            if self.logos:
+                self.logos.add_defs(self.dwg, (game.away, game.home))
+
+        passes = [
+            self.draw_inning_stripes,
+            self.draw_inning_separators,
+            self.draw_inning_numbers,
+            self.draw_team_boxes,
+            self.draw_game,
+        ]
         if self.game.innings and len(self.game.innings[0].halves) == 2:
-            self.draw_pitcher_hash_marks()
-            self.draw_pitcher_names()
-        self.draw_score()
-        self.draw_logos()
-
-        return self.dwg
+            passes += [self.draw_pitcher_hash_marks, self.draw_pitcher_names]
+        passes += [self.draw_score, self.draw_logos]
+        for draw_pass in passes:
+            with timed(draw_pass.__name__):
+                draw_pass()
+        count("svg_elements", getattr(self.dwg, "element_count", 0))
 
     def draw_logos(self):
-        self.dwg.add(
-            Image(get_logo(self.game.away), (ORIGIN_X, ORIGIN_Y - 50), (40, 40))
-        )
-        self.dwg.add(
-            Image(
-                get_logo(self.game.home),
-                (ORIGIN_X + ATBAT_W + SEPARATION + ATBAT_W - 40, ORIGIN_Y - 50),
-                (40, 40),
-            )
+        self.draw_logo(self.game.away, (ORIGIN_X, ORIGIN_Y - 50))
+        self.draw_logo(
+            self.game.home,
+            (ORIGIN_X + ATBAT_W + SEPARATION + ATBAT_W - 40, ORIGIN_Y - 50),
         )
 
+    def draw_logo(self, team, insert):
+        if self.logos:
+            self.dwg.add(self.logos.get_element(self.dwg, team, insert, (40, 40)))
+        else:
+            self.dwg.add(self.dwg.image(get_logo(team), insert, (40, 40)))
+
     def draw_score(self):
         away_score = 0
         home_score = 0
@@ -69,7 +123,7 @@ class DrawScorecard:
                     away_score = atbat.away_score
                     home_score = atbat.home_score
         self.dwg.add(
-            Text(
+            self.dwg.text(
                 away_score,
                 x=[ORIGIN_X + ATBAT_W],
                 y=[ORIGIN_Y - ATBAT_HT],
@@ -78,7 +132,7 @@ class DrawScorecard:
             )
         )
         self.dwg.add(
-            Text(
+            self.dwg.text(
                 home_score,
                 x=[ORIGIN_X + ATBAT_W + SEPARATION],
                 y=[ORIGIN_Y - ATBAT_HT],
@@ -88,13 +142,17 @@ class DrawScorecard:
         )
 
     def get_team_box(self, id, ht):
-        box = Group()
+        box = self.dwg.g()
         box["id"] = id
         box["class"] = "team-box"
-        box.add(Rect((ORIGIN_X, ORIGIN_Y), (ATBAT_W, ht)))
-        box.add(Line((ORIGIN_X + NAME_W, ORIGIN_Y), (ORIGIN_X + NAME_W, ORIGIN_Y + ht)))
+        box.add(self.dwg.rect((ORIGIN_X, ORIGIN_Y), (ATBAT_W, ht)))
         box.add(
-            Line(
+            self.dwg.line(
+                (ORIGIN_X + NAME_W, ORIGIN_Y), (ORIGIN_X + NAME_W, ORIGIN_Y + ht)
+            )
+        )
+        box.add(
+            self.dwg.line(
                 (ORIGIN_X + NAME_W + SCORE_W, ORIGIN_Y),
                 (ORIGIN_X + NAME_W + SCORE_W, ORIGIN_Y + ht),
             )
@@ -102,55 +160,45 @@ class DrawScorecard:
         return box
 
     def draw_team_boxes(self):
-        away_ht = sum(self.get_inning_height(inning) for inning in self.game.innings)
-        away_team = self.get_team_box("away_team", away_ht)
-
-        home_ht = away_ht
-        if self.is_no_final_bottom():
-            final_inning = self.game.innings[-1]
-            home_ht = away_ht - len(final_inning.halves[0].atbats) * ATBAT_HT
-        home_team = self.get_team_box("home_team", home_ht)
+        away_team = self.get_team_box("away_team", self.layout.away_height)
+        home_team = self.get_team_box("home_team", self.layout.home_height)
         flip(home_team)
 
         self.dwg.add(away_team)
         self.dwg.add(home_team)
 
     def draw_inning_stripes(self):
-        y = ORIGIN_Y
-        for i, inning in enumerate(self.game.innings):
-            inning_ht = self.get_inning_height(inning)
-            y += inning_ht
-            if not i % 2:
+        layout = self.layout
+        for i, (y, inning_ht) in enumerate(
+            zip(layout.inning_ys, layout.inning_heights)
+        ):
+            if i % 2:
+                continue
+            self.dwg.add(
+                self.dwg.rect(
+                    (ORIGIN_X, y),
+                    (ATBAT_W, inning_ht),
+                    class_="inning-fill",
+                )
+            )
+            if layout.is_home_side_drawn(i):
                 self.dwg.add(
-                    Rect(
-                        (ORIGIN_X, y - inning_ht),
+                    self.dwg.rect(
+                        (ORIGIN_X + ATBAT_W + SEPARATION, y),
                         (ATBAT_W, inning_ht),
                         class_="inning-fill",
                     )
                 )
 
-            if not (i == len(self.game.innings) - 1 and self.is_no_final_bottom()):
-                if not i % 2:
-                    self.dwg.add(
-                        Rect(
-                            (ORIGIN_X + ATBAT_W + SEPARATION, y - inning_ht),
-                            (ATBAT_W, inning_ht),
-                            class_="inning-fill",
-                        )
-                    )
-
     def draw_inning_separators(self):
-        y = ORIGIN_Y
-        for i, inning in enumerate(self.game.innings[:-1]):
-            inning_ht = self.get_inning_height(inning)
-            y += inning_ht
+        # Each separator is at the top of the following inning
+        for i, y in enumerate(self.layout.inning_ys[1:], 1):
             self.dwg.add(
-                Line((ORIGIN_X, y), (ORIGIN_X + ATBAT_W, y), class_="team-box")
+                self.dwg.line((ORIGIN_X, y), (ORIGIN_X + ATBAT_W, y), class_="team-box")
             )
-
-            if not (i == len(self.game.innings) - 2 and self.is_no_final_bottom()):
+            if self.layout.is_home_side_drawn(i):
                 self.dwg.add(
-                    Line(
+                    self.dwg.line(
                         (ORIGIN_X + ATBAT_W + SEPARATION, y),
                         (ORIGIN_X + 2 * ATBAT_W + SEPARATION, y),
                         class_="team-box",
@@ -158,15 +206,15 @@ class DrawScorecard:
                 )
 
     def draw_inning_numbers(self):
-        y = ORIGIN_Y
-        for i, inning in enumerate(self.game.innings):
-            inning_ht = self.get_inning_height(inning)
-            y += inning_ht
-            self.draw_inning_number(i + 1, y - inning_ht / 2)
+        layout = self.layout
+        for i, (y, inning_ht) in enumerate(
+            zip(layout.inning_ys, layout.inning_heights)
+        ):
+            self.draw_inning_number(i + 1, y + inning_ht / 2)
 
     def draw_inning_number(self, num, y):
         self.dwg.add(
-            Text(
+            self.dwg.text(
                 num,
                 x=[ORIGIN_X + ATBAT_W + SEPARATION / 2],
                 y=[y],
@@ -177,32 +225,28 @@ class DrawScorecard:
         )
 
     def draw_game(self):
-        self.y = ORIGIN_Y + ATBAT_HT
         for inning in self.game.innings:
             self.draw_inning(inning)
 
     def draw_inning(self, inning):
-        inning_start_y = self.y
-        inning_end_y = 0
         for half_inning in inning.halves:
-            self.y = inning_start_y
             self.draw_half_inning(half_inning)
-            inning_end_y = max(inning_end_y, self.y)
-        self.y = inning_end_y
 
     def draw_half_inning(self, half_inning):
+        self.set_x_and_anchor(half_inning.num)
+        is_home_team_batting = half_inning.num % 1.0
         for atbat in half_inning.atbats:
-            self.set_x_and_anchor(half_inning.num)
-            is_home_team_batting = half_inning.num % 1.0
+            self.y = self.layout.atbat_ys[atbat]
             self.draw_atbat(atbat, is_home_team_batting)
-            self.y += ATBAT_HT
 
     def draw_atbat(self, atbat, is_home_team_batting):
-        atbat_group = Group()
+        atbat_group = self.dwg.g()
         atbat_group.set_desc(atbat.get_description())
         atbat_group.add(self.get_batter_name_text(atbat))
         atbat_group.add(self.get_scoring_text(atbat))
-        self.runner_drawer.execute(self.y, atbat, atbat_group, is_home_team_batting)
+        self.runner_drawer.execute(
+            self.dwg, self.runner_segments[atbat], atbat_group, is_home_team_batting
+        )
         self.dwg.add(atbat_group)
 
     def set_x_and_anchor(self, inning):
@@ -216,7 +260,7 @@ class DrawScorecard:
             self.name_anchor = "end"
 
     def get_batter_name_text(self, atbat):
-        return Text(
+        return self.dwg.text(
             self.players.get(atbat.batter),
             x=[self.name_x],
             y=[self.y - TEXT_HOP],
@@ -225,7 +269,7 @@ class DrawScorecard:
         )
 
     def get_scoring_text(self, atbat):
-        text = Text(
+        text = self.dwg.text(
             atbat.scoring.code,
             x=[self.scoring_x],
             y=[self.y - TEXT_HOP],
@@ -246,45 +290,36 @@ class DrawScorecard:
         self.home_pitchers = [self.game.innings[0].halves[0].atbats[0].pitcher]
         self.away_pitchers = [self.game.innings[0].halves[1].atbats[0].pitcher]
 
-        self.y = ORIGIN_Y
         self.draw_both_hashes()
         for inning in self.game.innings:
-            inning_start = self.y
             for half_inning in inning.halves:
                 for atbat in half_inning.atbats:
                     if (
                         atbat.pitcher != self.home_pitchers[-1]
                         and atbat.pitcher != self.away_pitchers[-1]
                     ):
-                        self.draw_hash(half_inning.num)
+                        y = self.layout.atbat_ys[atbat] - ATBAT_HT
+                        self.draw_hash(half_inning.num, y)
                         self.swap_pitcher(atbat.pitcher, half_inning.num)
-                    self.y += ATBAT_HT
-                self.y = inning_start
-            self.y = inning_start + self.get_inning_height(inning)
-
-        self.draw_hash(1.0)
-        if self.is_no_final_bottom():
-            self.y = self.y - ATBAT_HT * len(inning.halves[0].atbats)
-        self.draw_hash(1.5)
 
-    def get_inning_height(self, inning):
-        return ATBAT_HT * max(len(h.atbats) for h in inning.halves)
+        self.draw_hash(1.0, self.layout.bottom)
+        self.draw_hash(1.5, self.layout.home_bottom)
 
     def draw_both_hashes(self):
-        self.draw_hash(1.0)
-        self.draw_hash(1.5)
+        self.draw_hash(1.0, ORIGIN_Y)
+        self.draw_hash(1.5, ORIGIN_Y)
 
-    def draw_hash(self, inning):
-        line = Line(
-            (ORIGIN_X + ATBAT_W + HASH_SEP, self.y),
-            (ORIGIN_X + ATBAT_W + HASH_SEP + HASH_LEN, self.y),
+    def draw_hash(self, inning, y):
+        line = self.dwg.line(
+            (ORIGIN_X + ATBAT_W + HASH_SEP, y),
+            (ORIGIN_X + ATBAT_W + HASH_SEP + HASH_LEN, y),
         )
         if self.is_home_team_batting(inning):
             flip(line)
-            self.home_hash_ys.append(self.y)
+            self.home_hash_ys.append(y)
             line["class"] = "away-pitcher-hash"
         else:
-            self.away_hash_ys.append(self.y)
+            self.away_hash_ys.append(y)
             line["class"] = "home-pitcher-hash"
         self.dwg.add(line)
 
@@ -294,9 +329,6 @@ class DrawScorecard:
         else:
             self.home_pitchers.append(pitcher)
 
-    def is_no_final_bottom(self):
-        return self.game.innings and not len(self.game.innings[-1].halves) == 2
-
     def draw_pitcher_names(self):
         self._draw_pitcher_names(self.away_hash_ys, False)
         self._draw_pitcher_names(self.home_hash_ys, True)
@@ -310,7 +342,7 @@ class DrawScorecard:
             else:
                 x = ORIGIN_X + ATBAT_W + HASH_SEP + HASH_LEN / 2
                 pitcher_name = self.players[self.home_pitchers[i]]
-            txt = Text(
+            txt = self.dwg.text(
                 pitcher_name,
                 x=[x],
                 y=[y_t],
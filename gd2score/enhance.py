@@ -9,8 +9,11 @@ class GameEnhancer:
     def execute(self, game):
         for inning in game:
             for half_inning in inning:
-                self.fix_half_inning(half_inning)
-                self.runner_highlighter.highlight(half_inning)
+                self.enhance_half_inning(half_inning)
+
+    def enhance_half_inning(self, half_inning):
+        self.fix_half_inning(half_inning)
+        self.runner_highlighter.highlight(half_inning)
 
     def fix_half_inning(self, half_inning):
         """Adds missing runner tags, and resolves the ending bases of runners
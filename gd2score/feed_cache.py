@@ -0,0 +1,122 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+
+from .feed_reader import read_feed, slim_feed
+
+FINAL_SUFFIX = ".json.gz"
+LIVE_SUFFIX = ".live.json.gz"
+
+
+def is_final(feed):
+    return feed["gameData"]["status"]["abstractGameState"] == "Final"
+
+
+class FeedCache:
+    """Keeps raw game feeds on disk as gzipped JSON, one file per gamePk.
+
+    Feeds of final games never expire; feeds of games still in progress are
+    only served for live_ttl seconds. Once the files add up to more than
+    max_bytes, the least recently used ones are removed.
+
+    With selective=True, feeds are slimmed before they are stored and read
+    back selectively, and with stream=True read back by streaming (see
+    feed_reader). Share a directory only between caches made alike."""
+
+    def __init__(
+        self,
+        directory,
+        max_bytes=2 * 1024**3,
+        live_ttl=60,
+        selective=False,
+        stream=False,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.live_ttl = live_ttl
+        self.selective = selective
+        self.stream = stream
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self.entries())
+
+    def get(self, game_id):
+        """Returns the cached feed, or None on a miss. Another process may
+        evict a file at any time, so a vanished file is just a miss."""
+        path = self.get_path(game_id, final=True)
+        try:
+            os.utime(path)  # Mark as recently used
+            return self.read(path)
+        except FileNotFoundError:
+            pass
+
+        path = self.get_path(game_id, final=False)
+        try:
+            if time.time() - os.path.getmtime(path) > self.live_ttl:
+                self.remove(path)
+                return None
+            return self.read(path)
+        except FileNotFoundError:
+            return None
+
+    def contains(self, game_id):
+        if os.path.exists(self.get_path(game_id, final=True)):
+            return True
+        try:
+            path = self.get_path(game_id, final=False)
+            return time.time() - os.path.getmtime(path) <= self.live_ttl
+        except FileNotFoundError:
+            return False
+
+    def put(self, game_id, feed):
+        final = is_final(feed)
+        path = self.get_path(game_id, final)
+        if final:
+            self.remove(self.get_path(game_id, final=False))
+        self.remove(path)
+        if self.selective or self.stream:
+            feed = slim_feed(feed)
+
+        # Write to a temporary file first so that concurrent readers never
+        # see a partially written feed.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz:
+                gz.write(json.dumps(feed, separators=(",", ":")).encode())
+        os.replace(tmp_path, path)
+
+        self.size += os.path.getsize(path)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used feeds until the cache fits in
+        max_bytes."""
+        for path, _, _ in sorted(self.entries(), key=lambda e: e[1]):
+            if self.size <= self.max_bytes:
+                break
+            self.remove(path)
+
+    def entries(self):
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(FINAL_SUFFIX):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+
+    def remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self.size -= size
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return read_feed(f, True, self.selective, self.stream)
+
+    def get_path(self, game_id, final):
+        suffix = FINAL_SUFFIX if final else LIVE_SUFFIX
+        return os.path.join(self.directory, str(game_id) + suffix)
@@ -0,0 +1,188 @@
+"""Decoding of game feeds.
+
+Only a small part of a feed is ever used: a few gameData fields and a few
+keys per play. Pitch tracking, hit data and the boxscore make up most of
+the bytes. Selective reads keep only what GameBuilder, GameParser and the
+local sources look at, in the same shape as the full feed, so either one
+can be built.
+
+A selective read still decodes the whole document, with orjson when it is
+installed, and then drops what isn't needed, so it saves memory held
+afterwards rather than decode time. The saving in decode time comes from
+decoding the smaller feed again: a FeedCache made with selective=True
+stores feeds already slimmed.
+
+Streaming reads (which need ijson, and are selective) never hold the whole
+document, trading decode time for a much lower peak memory. Without ijson
+they fall back to a selective read.
+"""
+
+import gzip
+import json
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+PLAYS_PREFIX = "liveData.plays.allPlays.item"
+CHUNK_SIZE = 64 * 1024
+SLIM_KEYS = {"gamePk", "link", "gameData", "liveData"}
+
+
+def loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_sorted(obj):
+    """Encodes obj as compact JSON with sorted keys, so equal objects give
+    equal bytes. orjson and json don't give the same bytes as each other."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+def read_feed(f, gzipped=False, selective=False, stream=False):
+    with timed("decode"):
+        if gzipped:
+            f = gzip.GzipFile(fileobj=f, mode="rb")
+        if stream and ijson:
+            return stream_feed(f)
+        feed = loads(f.read())
+        if selective or stream:
+            return slim_feed(feed)
+        return feed
+
+
+def read_game_data(f, gzipped=False):
+    """Returns just the gameData of a feed. With ijson, reading stops at
+    the end of gameData, before the plays that make up most of the feed."""
+    with timed("decode"):
+        if gzipped:
+            f = gzip.GzipFile(fileobj=f, mode="rb")
+        if ijson:
+            return next(ijson.items(f, "gameData", use_float=True))
+        return loads(f.read())["gameData"]
+
+
+def pick(d, keys):
+    return {key: d[key] for key in keys if key in d}
+
+
+def is_slim(feed):
+    """Tells feeds read selectively from full ones, by their top-level
+    keys alone."""
+    return feed.keys() == SLIM_KEYS and feed["liveData"].keys() == {"plays"}
+
+
+def slim_feed(feed):
+    return {
+        "gamePk": feed["gamePk"],
+        "link": feed["link"],
+        "gameData": slim_game_data(feed["gameData"]),
+        "liveData": {
+            "plays": {
+                "allPlays": [
+                    slim_play(p) for p in feed["liveData"]["plays"]["allPlays"]
+                ]
+            }
+        },
+    }
+
+
+def slim_game_data(game_data):
+    teams = game_data["teams"]
+    return {
+        # Kept so that slim feeds, as stored by a selective FeedCache, can be
+        # streamed too (see stream_feed)
+        "game": pick(game_data["game"], ("pk",)),
+        "status": game_data["status"],
+        "datetime": pick(game_data["datetime"], ("officialDate",)),
+        "teams": {
+            side: pick(teams[side], ("fileCode", "name")) for side in ("away", "home")
+        },
+        "players": {
+            key: pick(player, ("id", "initLastName"))
+            for key, player in game_data["players"].items()
+        },
+    }
+
+
+def slim_play(play):
+    matchup = play["matchup"]
+    return {
+        "about": pick(play["about"], ("inning", "halfInning", "isComplete")),
+        "atBatIndex": play["atBatIndex"],
+        "matchup": {
+            "batter": {"id": matchup["batter"]["id"]},
+            "pitcher": {"id": matchup["pitcher"]["id"]},
+        },
+        "count": pick(play["count"], ("outs",)),
+        "result": pick(
+            play["result"], ("eventType", "description", "homeScore", "awayScore")
+        ),
+        "actionIndex": play["actionIndex"],
+        "playEvents": [slim_play_event(e) for e in play["playEvents"]],
+        "runners": [slim_runner(r) for r in play["runners"]],
+    }
+
+
+def slim_play_event(event):
+    slim = pick(event, ("index", "base"))
+    slim["details"] = pick(event["details"], ("description", "eventType"))
+    if "player" in event:
+        slim["player"] = {"id": event["player"]["id"]}
+    return slim
+
+
+def slim_runner(runner):
+    details = runner["details"]
+    return {
+        "movement": pick(runner["movement"], ("start", "end", "outBase", "isOut")),
+        "details": {
+            "playIndex": details["playIndex"],
+            "runner": {"id": details["runner"]["id"]},
+        },
+    }
+
+
+def stream_feed(f):
+    """Reads a selective feed in one pass over f, slimming each play as
+    soon as ijson has built it. What is held at once is the full gameData,
+    the plays slimmed so far and the full plays finished by the last chunk
+    read, never the whole document."""
+    game_data_items = ijson.sendable_list()
+    play_items = ijson.sendable_list()
+    game_data_coro = ijson.items_coro(game_data_items, "gameData", use_float=True)
+    plays_coro = ijson.items_coro(play_items, PLAYS_PREFIX, use_float=True)
+
+    plays = []
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        game_data_coro.send(chunk)
+        plays_coro.send(chunk)
+        plays.extend(slim_play(p) for p in play_items)
+        del play_items[:]
+    game_data_coro.close()
+    plays_coro.close()
+    plays.extend(slim_play(p) for p in play_items)
+
+    game_data = game_data_items[0]
+    game_pk = game_data["game"]["pk"]
+    return {
+        "gamePk": game_pk,
+        "link": f"/api/v1.1/game/{game_pk}/feed/live",
+        "gameData": slim_game_data(game_data),
+        "liveData": {"plays": {"allPlays": plays}},
+    }
@@ -0,0 +1,274 @@
+from abc import ABC, abstractmethod
+import os
+import tarfile
+from datetime import date, datetime
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import statsapi
+
+from .feed_reader import read_feed, read_game_data
+
+JSON_SUFFIXES = (".json.gz", ".json")
+
+
+def to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def get_game_id(name):
+    """Returns the gamePk encoded in a file name like 530399.json.gz, or None
+    for any other file."""
+    name = os.path.basename(name)
+    for suffix in JSON_SUFFIXES:
+        if name.endswith(suffix) and name[: -len(suffix)].isdigit():
+            return int(name[: -len(suffix)])
+    return None
+
+
+def schedule_entry(game_id, game_date, status, away_name, home_name):
+    """A game in the same shape as the dicts returned by statsapi.schedule."""
+    return {
+        "game_id": game_id,
+        "game_date": game_date,
+        "status": status,
+        "away_name": away_name,
+        "home_name": home_name,
+    }
+
+
+def get_feed_path(game_id):
+    return f"/api/v1.1/game/{game_id}/feed/live"
+
+
+def get_schedule_path(start_date, end_date):
+    params = {
+        "sportId": 1,
+        "startDate": to_date(start_date).isoformat(),
+        "endDate": to_date(end_date).isoformat(),
+    }
+    return "/api/v1/schedule?" + urlencode(params)
+
+
+def parse_schedule(response):
+    """Flattens a raw /schedule response into schedule_entry dicts."""
+    games = []
+    for day in response.get("dates", []):
+        for game in day["games"]:
+            games.append(
+                schedule_entry(
+                    game["gamePk"],
+                    day["date"],
+                    game["status"]["detailedState"],
+                    game["teams"]["away"]["team"].get("name", "???"),
+                    game["teams"]["home"]["team"].get("name", "???"),
+                )
+            )
+    return games
+
+
+class FeedSource(ABC):
+    """Where GameBuilder and the batch driver get their data. get_feed
+    returns the game feed for a gamePk and schedule returns the games
+    played between two dates (inclusive) as statsapi.schedule style dicts.
+
+    Sources that decode feeds themselves take selective=True to return only
+    the fields needed to build a game, and stream=True to also decode them
+    without holding the whole document (see feed_reader). A FeedCache in
+    front of a source should read the same way."""
+
+    selective = False
+    stream = False
+
+    @abstractmethod
+    def get_feed(self, game_id):
+        pass
+
+    @abstractmethod
+    def schedule(self, start_date, end_date):
+        pass
+
+    def get_timecodes(self, game_id):
+        """Returns the timecodes of every update to a game's feed, or None if
+        the source can't tell when a feed changes."""
+        return None
+
+
+class StatsApiSource(FeedSource):
+    """Gets everything through statsapi, which decodes feeds in full.
+    Selective and streaming reads fetch feeds with an HttpSource instead."""
+
+    def __init__(self, selective=False, stream=False):
+        self.selective = selective
+        self.stream = stream
+        self.http_source = None
+        if selective or stream:
+            self.http_source = HttpSource(selective=selective, stream=stream)
+
+    def get_feed(self, game_id):
+        if self.http_source:
+            return self.http_source.get_feed(game_id)
+        return statsapi.get("game", {"gamePk": game_id})
+
+    def get_timecodes(self, game_id):
+        return statsapi.get("game_timestamps", {"gamePk": game_id})
+
+    def schedule(self, start_date, end_date):
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        return statsapi.schedule(
+            start_date=start_date.strftime("%m/%d/%Y"),
+            end_date=end_date.strftime("%m/%d/%Y"),
+        )
+
+
+class HttpSource(FeedSource):
+    """Talks to any server exposing the Stats API paths, such as a local
+    stand-in serving recorded feeds."""
+
+    def __init__(
+        self,
+        base_url="https://statsapi.mlb.com",
+        timeout=30,
+        selective=False,
+        stream=False,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.selective = selective
+        self.stream = stream
+
+    def get_feed(self, game_id):
+        return self.get(get_feed_path(game_id), self.selective, self.stream)
+
+    def schedule(self, start_date, end_date):
+        return parse_schedule(self.get(get_schedule_path(start_date, end_date)))
+
+    def get_timecodes(self, game_id):
+        return self.get(get_feed_path(game_id) + "/timestamps")
+
+    def get(self, path, selective=False, stream=False):
+        with urlopen(self.base_url + path, timeout=self.timeout) as response:
+            gzipped = response.headers.get("Content-Encoding") == "gzip"
+            return read_feed(response, gzipped, selective, stream)
+
+
+class LocalSource(FeedSource):
+    """Base class for sources holding a fixed set of feeds. The schedule is
+    built from the feeds themselves the first time it is asked for."""
+
+    _schedule = None
+
+    @abstractmethod
+    def game_ids(self):
+        pass
+
+    def schedule(self, start_date, end_date):
+        if self._schedule is None:
+            self._schedule = sorted(
+                (self.get_schedule_entry(game_id) for game_id in self.game_ids()),
+                key=lambda g: (g["game_date"], g["game_id"]),
+            )
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        return [
+            game
+            for game in self._schedule
+            if start_date <= to_date(game["game_date"]) <= end_date
+        ]
+
+    def get_schedule_entry(self, game_id):
+        game_data = self.get_game_data(game_id)
+        return schedule_entry(
+            game_id,
+            game_data["datetime"]["officialDate"],
+            game_data["status"]["detailedState"],
+            game_data["teams"]["away"]["name"],
+            game_data["teams"]["home"]["name"],
+        )
+
+    def get_game_data(self, game_id):
+        """Returns the gameData of a feed, which is all the schedule needs."""
+        return self.get_feed(game_id)["gameData"]
+
+
+class MemorySource(LocalSource):
+    def __init__(self, feeds):
+        self.feeds = feeds
+
+    def game_ids(self):
+        return list(self.feeds)
+
+    def get_feed(self, game_id):
+        return self.feeds[game_id]
+
+
+class DirectorySource(LocalSource):
+    """Reads feeds saved as <gamePk>.json or <gamePk>.json.gz."""
+
+    def __init__(self, directory, selective=False, stream=False):
+        self.directory = directory
+        self.selective = selective
+        self.stream = stream
+        self.paths = {}
+        for name in sorted(os.listdir(directory)):
+            game_id = get_game_id(name)
+            if game_id is not None:
+                self.paths.setdefault(game_id, os.path.join(directory, name))
+
+    def game_ids(self):
+        return list(self.paths)
+
+    def get_feed(self, game_id):
+        path = self.paths[game_id]
+        with open(path, "rb") as f:
+            return read_feed(f, path.endswith(".gz"), self.selective, self.stream)
+
+    def get_game_data(self, game_id):
+        path = self.paths[game_id]
+        with open(path, "rb") as f:
+            return read_game_data(f, path.endswith(".gz"))
+
+
+class TarballSource(LocalSource):
+    """Reads feeds saved as <gamePk>.json or <gamePk>.json.gz members of a
+    tar archive. An uncompressed archive allows seeking straight to a
+    member; a compressed one is decompressed up to it on every read."""
+
+    def __init__(self, path, selective=False, stream=False):
+        self.path = path
+        self.selective = selective
+        self.stream = stream
+        self.names = {}
+        with tarfile.open(path) as tar:
+            for member in tar.getmembers():
+                game_id = get_game_id(member.name)
+                if member.isfile() and game_id is not None:
+                    self.names.setdefault(game_id, member.name)
+        self._tar = None
+
+    def __getstate__(self):
+        # Open archives can't be sent to worker processes
+        state = self.__dict__.copy()
+        state["_tar"] = None
+        return state
+
+    def game_ids(self):
+        return list(self.names)
+
+    def get_feed(self, game_id):
+        name = self.names[game_id]
+        with self.open_member(name) as f:
+            return read_feed(f, name.endswith(".gz"), self.selective, self.stream)
+
+    def get_game_data(self, game_id):
+        name = self.names[game_id]
+        with self.open_member(name) as f:
+            return read_game_data(f, name.endswith(".gz"))
+
+    def open_member(self, name):
+        if self._tar is None:
+            self._tar = tarfile.open(self.path)
+        return self._tar.extractfile(name)
@@ -0,0 +1,236 @@
+"""A compact binary form of built games.
+
+Parsing a feed, enhancing the game and scoring its at-bats give the same
+Game every time, so it can be saved once and drawn from the archive as
+often as the drawing code changes. Loading an archive is only unpacking:
+there is no JSON to decode and no description to parse. Archives have to
+be rebuilt from the feeds when the parsing, enhancing or scoring changes.
+
+The layout, all little-endian:
+
+    header   magic, format version (H), string count (I)
+    strings  length (H) and UTF-8 bytes of each string, which everything
+             below refers to by index (I), NO_STRING for None
+    game     gamePk (q), in_progress (B), date, away, home, link (I),
+             player count (I), inning count (H)
+    players  id (i), name (I)
+    innings  num (H), half count (B), then each half's at-bat count (H)
+             followed by its at-bats
+    at-bat   pa_num, event_num, batter, pitcher (i), outs (b), away_score,
+             home_score (h), des, event, scoring code, scoring result (I),
+             mid-PA runner count, runner count (H), then its mid-PA runners
+             and runners
+    runner   id (i), start, end (b), event_num (i), flags (B)
+"""
+
+import os
+import struct
+
+from .atomic import atomic_write
+from .models import AtBat, Game, HalfInning, Inning, Player, Runner
+from .scoring import Scoring
+
+MAGIC = b"GD2G"
+FORMAT_VERSION = 2
+SUFFIX = ".gd2g"
+NO_STRING = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sHI")
+STRING_LENGTH = struct.Struct("<H")
+GAME = struct.Struct("<qBIIIIIH")
+PLAYER = struct.Struct("<iI")
+INNING = struct.Struct("<HB")
+HALF_INNING = struct.Struct("<H")
+ATBAT = struct.Struct("<iiiibhhIIIIHH")
+RUNNER = struct.Struct("<ibbiB")
+
+OUT = 1
+TO_SCORE = 2
+
+
+class StringTable:
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def add(self, string):
+        if string is None:
+            return NO_STRING
+        id = self.ids.get(string)
+        if id is None:
+            id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return id
+
+    def pack(self):
+        out = bytearray()
+        for string in self.strings:
+            data = string.encode("utf-8")
+            out += STRING_LENGTH.pack(len(data))
+            out += data
+        return out
+
+
+def dumps(game):
+    strings = StringTable()
+    body = bytearray()
+    body += GAME.pack(
+        game.game_pk,
+        game.in_progress,
+        strings.add(game.date),
+        strings.add(game.away),
+        strings.add(game.home),
+        strings.add(game.link),
+        len(game.players),
+        len(game.innings),
+    )
+    for id, player in game.players.items():
+        body += PLAYER.pack(id, strings.add(player.name))
+    for inning in game.innings:
+        body += INNING.pack(inning.num, len(inning.halves))
+        for half_inning in inning.halves:
+            body += HALF_INNING.pack(len(half_inning.atbats))
+            for atbat in half_inning.atbats:
+                pack_atbat(body, atbat, strings)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(strings.strings))
+    return bytes(header + strings.pack() + body)
+
+
+def pack_atbat(out, atbat, strings):
+    scoring = atbat.scoring
+    out += ATBAT.pack(
+        atbat.pa_num,
+        atbat.event_num,
+        atbat.batter,
+        atbat.pitcher,
+        atbat.outs,
+        atbat.away_score,
+        atbat.home_score,
+        strings.add(atbat.des),
+        strings.add(atbat.event),
+        strings.add(scoring.code),
+        strings.add(scoring.result),
+        len(atbat.mid_pa_runners),
+        len(atbat.runners),
+    )
+    for runner in atbat.mid_pa_runners + atbat.runners:
+        flags = (OUT if runner.out else 0) | (TO_SCORE if runner.to_score else 0)
+        out += RUNNER.pack(runner.id, runner.start, runner.end, runner.event_num, flags)
+
+
+def loads(data, player_registry=None):
+    """Returns the Game archived in data. Given a PlayerRegistry, players
+    come from it instead of being created for this game alone."""
+    data = memoryview(data)
+    magic, version, string_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a game archive")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported game archive version %d" % version)
+    offset = HEADER.size
+
+    strings = []
+    for _ in range(string_count):
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(str(data[offset : offset + length], "utf-8"))
+        offset += length
+
+    def get_string(id):
+        return None if id == NO_STRING else strings[id]
+
+    game = Game()
+    (
+        game.game_pk,
+        in_progress,
+        date,
+        away,
+        home,
+        link,
+        player_count,
+        inning_count,
+    ) = GAME.unpack_from(data, offset)
+    offset += GAME.size
+    game.in_progress = bool(in_progress)
+    game.date, game.away, game.home, game.link = map(
+        get_string, (date, away, home, link)
+    )
+
+    for _ in range(player_count):
+        id, name = PLAYER.unpack_from(data, offset)
+        offset += PLAYER.size
+        if player_registry:
+            game.players[id] = player_registry.get(id, strings[name])
+        else:
+            game.players[id] = Player(id, strings[name])
+
+    for _ in range(inning_count):
+        num, half_count = INNING.unpack_from(data, offset)
+        offset += INNING.size
+        inning = Inning(num)
+        for _ in range(half_count):
+            (atbat_count,) = HALF_INNING.unpack_from(data, offset)
+            offset += HALF_INNING.size
+            half_inning = HalfInning()
+            inning.add_half(half_inning)
+            for _ in range(atbat_count):
+                atbat, offset = unpack_atbat(data, offset, strings)
+                half_inning.add_atbat(atbat)
+        game.add_inning(inning)
+    return game
+
+
+def unpack_atbat(data, offset, strings):
+    (
+        pa_num,
+        event_num,
+        batter,
+        pitcher,
+        outs,
+        away_score,
+        home_score,
+        des,
+        event,
+        code,
+        result,
+        mid_pa_count,
+        runner_count,
+    ) = ATBAT.unpack_from(data, offset)
+    offset += ATBAT.size
+    runners = []
+    for _ in range(mid_pa_count + runner_count):
+        id, start, end, runner_event_num, flags = RUNNER.unpack_from(data, offset)
+        offset += RUNNER.size
+        runner = Runner(id, start, end, runner_event_num, bool(flags & OUT))
+        runner.to_score = bool(flags & TO_SCORE)
+        runners.append(runner)
+    atbat = AtBat(
+        pa_num,
+        event_num,
+        batter,
+        strings[des],
+        strings[event],
+        pitcher,
+        outs,
+        home_score,
+        away_score,
+        runners[:mid_pa_count],
+        runners[mid_pa_count:],
+    )
+    atbat.scoring = Scoring(strings[code], strings[result])
+    return atbat, offset
+
+
+def save(game, path):
+    data = dumps(game)
+    with atomic_write(path) as f:
+        f.write(data)
+
+
+def load(path, player_registry=None):
+    with open(path, "rb") as f:
+        return loads(f.read(), player_registry)
+
+
+def get_archive_path(directory, game_id):
+    return os.path.join(directory, f"{game_id}{SUFFIX}")
@@ -0,0 +1,55 @@
+from .constants import ORIGIN_Y, ATBAT_HT
+
+
+class Layout:
+    """Vertical positions of everything on a game's scorecard, computed in
+    one pass over the game.
+
+    Innings are stacked from ORIGIN_Y down, each as tall as its longer half.
+    Both halves of an inning start at the inning's top and give each at-bat
+    a row ATBAT_HT high. When the home team didn't bat in the final inning,
+    its side of the card stops at the end of the previous inning.
+
+    inning_ys[i] and inning_heights[i] are the top and height of the i-th
+    inning. half_inning_ys maps each HalfInning to its top and atbat_ys maps
+    each AtBat to the bottom of its row, which is where its texts and runner
+    lines are anchored. bottom and home_bottom are the ends of the away and
+    home sides."""
+
+    def __init__(self, game):
+        self.inning_ys = []
+        self.inning_heights = []
+        self.half_inning_ys = {}
+        self.atbat_ys = {}
+
+        y = ORIGIN_Y
+        for inning in game.innings:
+            self.inning_ys.append(y)
+            for half_inning in inning.halves:
+                self.half_inning_ys[half_inning] = y
+                atbat_y = y
+                for atbat in half_inning.atbats:
+                    atbat_y += ATBAT_HT
+                    self.atbat_ys[atbat] = atbat_y
+            height = ATBAT_HT * max(len(h.atbats) for h in inning.halves)
+            self.inning_heights.append(height)
+            y += height
+        self.bottom = y
+
+        self.no_final_bottom = bool(game.innings) and len(game.innings[-1].halves) != 2
+        self.home_bottom = self.bottom
+        if self.no_final_bottom:
+            final_top = game.innings[-1].halves[0]
+            self.home_bottom -= len(final_top.atbats) * ATBAT_HT
+
+    @property
+    def away_height(self):
+        return self.bottom - ORIGIN_Y
+
+    @property
+    def home_height(self):
+        return self.home_bottom - ORIGIN_Y
+
+    def is_home_side_drawn(self, inning_index):
+        """Whether the home side of the card covers the inning."""
+        return not (self.no_final_bottom and inning_index == len(self.inning_ys) - 1)
@@ -0,0 +1,118 @@
+from itertools import groupby, zip_longest
+
+from .build_game import GameBuilder
+from .draw_scorecard import DrawScorecard
+from .feed_cache import is_final
+from .models import Game, Inning
+
+
+def get_half_inning_key(play):
+    return int(play["about"]["inning"]), play["about"]["halfInning"]
+
+
+class LiveGame:
+    """Keeps the Game of an in-progress game between polls of its feed.
+
+    Each update re-parses and re-enhances only the half-innings holding
+    plays that are new, gone or changed. Every other HalfInning object is
+    carried over untouched, which is what lets LiveScorecard reuse their
+    drawings. When the source reports timecodes, a poll that finds no new
+    timecode skips the feed download altogether."""
+
+    def __init__(self, game_id, source=None, game_builder=None):
+        self.game_id = game_id
+        self.game_builder = game_builder or GameBuilder(source)
+        self.source = self.game_builder.source
+        self.game = None
+        self.plays = []
+        self.half_innings = {}
+        self.timecode = None
+
+    def poll(self):
+        """Fetches the feed if it changed and returns the half-innings that
+        were rebuilt."""
+        timecodes = self.source.get_timecodes(self.game_id)
+        if timecodes:
+            if timecodes[-1] == self.timecode:
+                return []
+            self.timecode = timecodes[-1]
+        return self.update(self.source.get_feed(self.game_id))
+
+    def update(self, feed):
+        """Brings the game up to date with feed and returns the half-innings
+        that were rebuilt."""
+        plays = feed["liveData"]["plays"]["allPlays"]
+        dirty = set(map(get_half_inning_key, self.get_changed_plays(plays)))
+        self.plays = plays
+
+        game_parser = self.game_builder.game_parser
+        game_enhancer = self.game_builder.game_enhancer
+        rebuilt = []
+        half_innings = {}
+        game = Game()
+        for key, half_plays in groupby(plays, get_half_inning_key):
+            half_inning = self.half_innings.get(key)
+            if key in dirty or half_inning is None:
+                half_inning = game_parser.parse_half_inning(half_plays)
+                game_enhancer.enhance_half_inning(half_inning)
+                rebuilt.append(half_inning)
+            half_innings[key] = half_inning
+
+            inning_num = key[0]
+            if not game.innings or game.innings[-1].num != inning_num:
+                game.add_inning(Inning(inning_num))
+            game.innings[-1].add_half(half_inning)
+        self.half_innings = half_innings
+
+        self.game_builder.set_game_data(game, feed)
+        game.in_progress = not is_final(feed)
+        self.game = game
+        return rebuilt
+
+    def get_changed_plays(self, plays):
+        """Yields the plays, from the last feed and this one, that aren't
+        the same in both. Complete plays are compared too, since scoring
+        changes and overturned challenges rewrite them. The feed has to be
+        a new one, not the last one changed in place."""
+        for old, new in zip_longest(self.plays, plays):
+            if old != new:
+                if old is not None:
+                    yield old
+                if new is not None:
+                    yield new
+
+
+class LiveScorecard(DrawScorecard):
+    """Redraws a LiveGame after each update, reusing the at-bat drawings of
+    every half-inning object that is unchanged and still at the same place.
+    Only the game-wide decorations are drawn from scratch each time."""
+
+    def __init__(self):
+        DrawScorecard.__init__(self)
+        self.drawn_half_innings = {}
+
+    def draw(self, game):
+        self.seen_half_innings = {}
+        drawing = DrawScorecard.draw(self, game)
+        self.drawn_half_innings = self.seen_half_innings
+        return drawing
+
+    def draw_to(self, game, fileobj):
+        # Reusing drawings needs the drawing to keep its elements, so this
+        # can't stream.
+        self.draw(game).write(fileobj)
+
+    def draw_half_inning(self, half_inning):
+        key = id(half_inning)
+        y = self.layout.half_inning_ys[half_inning]
+        drawn = self.drawn_half_innings.get(key)
+        if drawn and drawn[0] is half_inning and drawn[1] == y:
+            elements = drawn[2]
+            for element in elements:
+                self.dwg.add(element)
+        else:
+            first = len(self.dwg.elements)
+            DrawScorecard.draw_half_inning(self, half_inning)
+            elements = self.dwg.elements[first:]
+        # Holding on to half_inning keeps its id from being reused
+        self.seen_half_innings[key] = (half_inning, y, elements)
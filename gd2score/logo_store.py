@@ -0,0 +1,194 @@
+import base64
+import logging
+import os
+import re
+import urllib.request
+
+from . import svg
+from .logo_lookup import CODE, LOGO_URL
+
+# Shown for teams without a logo file: a plain grey disc
+FALLBACK_LOGO = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 40 40">'
+    '<circle cx="20" cy="20" r="18" fill="#ccc"/></svg>'
+)
+FALLBACK_ID = "logo-fallback"
+
+MODES = ("data", "symbol", "sprite")
+
+SVG_START_RE = re.compile(r"<svg\b([^>]*)>")
+VIEWBOX_RE = re.compile(r"""\bviewBox\s*=\s*["']([^"']*)["']""")
+WIDTH_RE = re.compile(r"""\bwidth\s*=\s*["']([\d.]+)""")
+HEIGHT_RE = re.compile(r"""\bheight\s*=\s*["']([\d.]+)""")
+ID_RE = re.compile(r"""\bid\s*=\s*["']([^"']+)["']""")
+# An id or a reference to one: url(#id), href="#id" or xlink:href="#id"
+ID_OR_REF_RE = re.compile(
+    r"""(\bid\s*=\s*["']|\burl\(\s*["']?#|\bhref\s*=\s*["']#)([^"')\s]+)"""
+)
+
+
+def split_logo(logo, name="logo"):
+    """Returns the viewBox and the inner markup of an SVG document. Raises
+    ValueError, naming the document name, if it has no size to take a
+    viewBox from."""
+    match = SVG_START_RE.search(logo)
+    end = logo.rfind("</svg>")
+    if not match or end < match.end():
+        raise ValueError("%s is not an SVG document" % name)
+    attribs = match.group(1)
+    view_box = VIEWBOX_RE.search(attribs)
+    if view_box:
+        view_box = view_box.group(1)
+    else:
+        width = WIDTH_RE.search(attribs)
+        height = HEIGHT_RE.search(attribs)
+        if not (width and height):
+            raise ValueError("%s has neither a viewBox nor a width and height" % name)
+        view_box = "0 0 %s %s" % (width.group(1), height.group(1))
+    return view_box, logo[match.end() : end]
+
+
+def prefix_ids(markup, prefix):
+    """Prefixes the ids defined in markup, and the references to them, so
+    that several logos can share a document."""
+    ids = set(ID_RE.findall(markup))
+
+    def replace(match):
+        if match.group(2) not in ids:
+            return match.group(0)
+        return match.group(1) + prefix + match.group(2)
+
+    return ID_OR_REF_RE.sub(replace, markup)
+
+
+def download_logos(directory, timeout=30):
+    """Saves the logo of every team in CODE to directory, named the way
+    LogoStore expects."""
+    os.makedirs(directory, exist_ok=True)
+    for team_id in CODE.values():
+        with urllib.request.urlopen(f"{LOGO_URL}{team_id}.svg", timeout=timeout) as r:
+            logo = r.read()
+        with open(os.path.join(directory, f"{team_id}.svg"), "wb") as f:
+            f.write(logo)
+
+
+class LogoStore:
+    """Team logos read from a local directory of <team id>.svg files, named
+    as under LOGO_URL, so scorecards don't send viewers to another host.
+    Each logo is read once and kept for the life of the process. Teams
+    without a file, including codes missing from CODE, get the fallback
+    logo (the SVG file at fallback, or FALLBACK_LOGO), as do teams whose
+    file can't be made into a symbol.
+
+    mode decides how a scorecard shows them:
+
+    - data: an <image> with the logo inlined as a data URI
+    - symbol: the logo inlined once as a <symbol> in <defs> and placed with
+      <use> (fast backend only)
+    - sprite: a <use> pointing into the sprite sheet at sprite_url, which
+      write_sprite() creates
+    """
+
+    def __init__(self, directory, mode="data", fallback=None, sprite_url="logos.svg"):
+        if mode not in MODES:
+            raise ValueError("Unknown logo mode: %s" % mode)
+        self.directory = directory
+        self.mode = mode
+        self.sprite_url = sprite_url
+        self.fallback = FALLBACK_LOGO
+        if fallback:
+            with open(fallback, encoding="utf-8") as f:
+                self.fallback = f.read()
+            if mode != "data":
+                # Check it now rather than in every game that needs it
+                split_logo(self.fallback, fallback)
+        self.logos = {}
+        self.data_uris = {}
+
+    def __repr__(self):
+        # Stable across processes, as part of the renderer version
+        return "LogoStore(%r, %r, sprite_url=%r)" % (
+            self.directory,
+            self.mode,
+            self.sprite_url,
+        )
+
+    def get_logo(self, team):
+        """Returns the SVG document of team's logo."""
+        try:
+            return self.logos[team]
+        except KeyError:
+            pass
+        path = self.get_path(team)
+        if path:
+            with open(path, encoding="utf-8") as f:
+                logo = f.read()
+        else:
+            logo = self.fallback
+        self.logos[team] = logo
+        return logo
+
+    def get_path(self, team):
+        """Returns the path of team's logo file, or None if it has none."""
+        if team not in CODE:
+            return None
+        path = os.path.join(self.directory, "%d.svg" % CODE[team])
+        return path if os.path.exists(path) else None
+
+    def get_data_uri(self, team):
+        try:
+            return self.data_uris[team]
+        except KeyError:
+            pass
+        data = base64.b64encode(self.get_logo(team).encode()).decode("ascii")
+        self.data_uris[team] = "data:image/svg+xml;base64," + data
+        return self.data_uris[team]
+
+    def get_symbol_id(self, team):
+        return "logo-" + team if self.get_path(team) else FALLBACK_ID
+
+    def get_symbol(self, team):
+        """Returns team's logo as a symbol. The ids inside it are prefixed
+        with the symbol's id, since other logos in the same document may
+        use the same ones."""
+        symbol_id = self.get_symbol_id(team)
+        path = self.get_path(team)
+        try:
+            view_box, markup = split_logo(self.get_logo(team), path or "fallback")
+        except ValueError as error:
+            if not path:
+                raise
+            logging.warning("Using the fallback logo for %s: %s", team, error)
+            view_box, markup = split_logo(self.fallback, "fallback")
+        symbol = svg.Symbol(id=symbol_id, viewBox=view_box)
+        symbol.add(svg.Raw(prefix_ids(markup, symbol_id + "-")))
+        return symbol
+
+    def add_defs(self, dwg, teams):
+        """Defines the logos of teams in dwg in symbol mode. Has to be
+        called before anything is added to a streaming drawing."""
+        if self.mode == "symbol":
+            symbol_ids = set()
+            for team in teams:
+                if self.get_symbol_id(team) not in symbol_ids:
+                    symbol_ids.add(self.get_symbol_id(team))
+                    dwg.defs.add(self.get_symbol(team))
+
+    def get_element(self, dwg, team, insert, size):
+        if self.mode == "data":
+            return dwg.image(self.get_data_uri(team), insert, size)
+        href = "#" + self.get_symbol_id(team)
+        if self.mode == "sprite":
+            href = self.sprite_url + href
+        return dwg.use(href, insert, size)
+
+    def write_sprite(self, path):
+        """Writes a sprite sheet with a symbol for every team in CODE that
+        has a logo, plus the fallback."""
+        dwg = svg.Drawing(compact=True)
+        for team in CODE:
+            if self.get_path(team):
+                dwg.add(self.get_symbol(team))
+        dwg.add(self.get_symbol(None))
+        with open(path, "w", encoding="utf-8") as f:
+            dwg.write(f)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+
+from .feed_reader import dumps_sorted, is_slim, slim_feed
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_feed(feed):
+    """Hashes the parts of a feed that games are built from, so revisions
+    to anything else (pitch tracking, the boxscore) don't count as
+    changes. Feeds read selectively are hashed as they are, which gives
+    the same hash as slimming the full feed."""
+    if not is_slim(feed):
+        feed = slim_feed(feed)
+    return hashlib.sha1(dumps_sorted(feed)).hexdigest()
+
+
+def get_renderer_version(draw_options=None):
+    """Hashes the package's code and the drawing options, which together
+    decide what a feed is rendered to."""
+    h = hashlib.sha1()
+    for name in sorted(os.listdir(PACKAGE_DIR)):
+        if name.endswith(".py"):
+            h.update(name.encode())
+            with open(os.path.join(PACKAGE_DIR, name), "rb") as f:
+                h.update(f.read())
+    h.update(repr(sorted((draw_options or {}).items())).encode())
+    return h.hexdigest()
+
+
+class Manifest:
+    """Records the feed hash each game was last rendered from, along with the
+    renderer version that rendered it. A game whose feed and renderer are
+    both unchanged doesn't need rendering again.
+
+    Entries are appended to a JSON lines file as each game finishes, so a
+    batch that crashes resumes where it stopped. compact() rewrites the file
+    with only the latest entry of each game."""
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.entries = {}
+        self.file = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Cut short by a crash
+                    self.entries[entry["game_id"]] = entry
+
+    def get_hash(self, game_id):
+        """Returns the feed hash game_id was rendered from by this version,
+        or None."""
+        entry = self.entries.get(game_id)
+        if entry and entry["renderer"] == self.version:
+            return entry["feed_hash"]
+        return None
+
+    def record(self, game_id, feed_hash):
+        entry = {"game_id": game_id, "feed_hash": feed_hash, "renderer": self.version}
+        if self.entries.get(game_id) == entry:
+            return
+        self.entries[game_id] = entry
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def compact(self):
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,299 @@
+"""Per-stage timers and counters for the build and draw pipeline.
+
+Stages are marked with `with timed("parse"):` and counts with
+count("atbats", n). Both do nothing unless a Metrics is active and cost a
+couple of microseconds when one is, so they are left on in production;
+code run for every element or at-bat times itself and calls record().
+Stage times are exclusive: time spent in a nested stage (decoding inside a
+fetch, serializing inside a draw pass) only counts towards the nested one,
+so the stages of a game add up to its total.
+
+A Metrics holds one game, or a batch of games added together. Batches also
+keep the slowest game's time for each stage, to find tail-latency outliers.
+
+With memory=True, timed() stages also measure memory with tracemalloc:
+the peak allocated above what was allocated when the stage started, and
+what it left allocated when it ended (negative if it freed more than it
+allocated). Unlike times, these include nested stages. The whole game is
+measured as the "game" stage. tracemalloc slows everything down
+severalfold, so this is for finding memory hogs, not for production
+timings.
+"""
+
+import cProfile
+from contextlib import contextmanager
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+# The Metrics that timed() and count() record into
+_active = None
+
+
+class Stage:
+    __slots__ = ("metrics", "name", "start", "nested", "start_memory")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        if self.metrics.memory:
+            self.start_memory = self.metrics.start_memory()
+        self.metrics.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        metrics = self.metrics
+        metrics.stack.pop()
+        if metrics.stack:
+            metrics.stack[-1].nested += elapsed
+        timings = metrics.timings
+        timings[self.name] = timings.get(self.name, 0.0) + elapsed - self.nested
+        if metrics.memory:
+            metrics.stop_memory(self.name, self.start_memory)
+
+
+class NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+class Metrics:
+    def __init__(self, memory=False):
+        self.games = 0
+        self.timings = {}
+        self.max_timings = {}
+        self.counters = {}
+        self.stack = []
+        self.memory = memory
+        # Bytes by stage, the largest of any game in a batch
+        self.peaks = {}
+        self.retained = {}
+        # Model objects built, by class name
+        self.objects = {}
+        # The running peak of each open stage, since tracemalloc only keeps one
+        self.peak_stack = []
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls("peak_bytes" in data)
+        metrics.games = data["games"]
+        metrics.timings = data["seconds"]
+        metrics.max_timings = data["max_seconds"]
+        metrics.counters = data["counts"]
+        metrics.peaks = data.get("peak_bytes", {})
+        metrics.retained = data.get("retained_bytes", {})
+        metrics.objects = data.get("objects", {})
+        return metrics
+
+    @property
+    def peak(self):
+        """The peak memory of the (largest) game, in bytes."""
+        return self.peaks.get("game", 0)
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if self.stack:
+            self.stack[-1].nested += seconds
+
+    @contextmanager
+    def activate(self):
+        """Makes timed() and count() record into this Metrics, as one game."""
+        global _active
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        previous, _active = _active, self
+        try:
+            with Stage(self, "game") if self.memory else NULL_STAGE:
+                yield self
+        finally:
+            _active = previous
+            self.games += 1
+            # The game isn't a stage of its own
+            self.timings.pop("game", None)
+
+    def start_memory(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.peak_stack:
+            self.peak_stack[-1] = max(self.peak_stack[-1], peak)
+        self.peak_stack.append(current)
+        tracemalloc.reset_peak()
+        return current
+
+    def stop_memory(self, name, start):
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(self.peak_stack.pop(), peak)
+        if self.peak_stack:
+            self.peak_stack[-1] = max(self.peak_stack[-1], peak)
+        self.peaks[name] = max(self.peaks.get(name, 0), peak - start)
+        self.retained[name] = self.retained.get(name, 0) + current - start
+
+    def count_objects(self, objects):
+        for obj in objects:
+            name = type(obj).__name__
+            self.objects[name] = self.objects.get(name, 0) + 1
+
+    def add(self, other):
+        """Adds the games of other to this batch."""
+        self.games += other.games
+        for name, seconds in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        other_max = other.max_timings if other.games > 1 else other.timings
+        for name, seconds in other_max.items():
+            if seconds > self.max_timings.get(name, 0.0):
+                self.max_timings[name] = seconds
+        for name, n in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + n
+        for name, n in other.objects.items():
+            self.objects[name] = self.objects.get(name, 0) + n
+        for mine, theirs in (
+            (self.peaks, other.peaks),
+            (self.retained, other.retained),
+        ):
+            for name, n in theirs.items():
+                mine[name] = max(mine.get(name, 0), n)
+
+    def as_dict(self):
+        data = {
+            "games": self.games,
+            "seconds": self.timings,
+            "max_seconds": self.max_timings if self.games > 1 else self.timings,
+            "counts": self.counters,
+        }
+        if self.memory:
+            data.update(
+                peak_bytes=self.peaks,
+                retained_bytes=self.retained,
+                objects=self.objects,
+            )
+        return data
+
+    def to_json(self, **extra):
+        return json.dumps(dict(extra, **self.as_dict()), sort_keys=True)
+
+    def to_prometheus(self, prefix="gd2score", labels=None):
+        """Returns the metrics in the Prometheus text exposition format,
+        with labels (a dict) added to every sample."""
+        data = self.as_dict()
+        lines = [
+            f"# TYPE {prefix}_games_total counter",
+            f"{prefix}_games_total{format_labels(labels)} {data['games']}",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for name, seconds in sorted(data["seconds"].items()):
+            stage_labels = format_labels(labels, stage=name)
+            lines.append(f"{prefix}_stage_seconds_total{stage_labels} {seconds:.6f}")
+        lines.append(f"# TYPE {prefix}_stage_max_seconds gauge")
+        for name, seconds in sorted(data["max_seconds"].items()):
+            stage_labels = format_labels(labels, stage=name)
+            lines.append(f"{prefix}_stage_max_seconds{stage_labels} {seconds:.6f}")
+        for name, n in sorted(data["counts"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total{format_labels(labels)} {n}")
+        if self.memory:
+            for key in ("peak_bytes", "retained_bytes"):
+                lines.append(f"# TYPE {prefix}_stage_{key} gauge")
+                for name, n in sorted(data[key].items()):
+                    stage_labels = format_labels(labels, stage=name)
+                    lines.append(f"{prefix}_stage_{key}{stage_labels} {n}")
+            lines.append(f"# TYPE {prefix}_model_objects_total counter")
+            for name, n in sorted(data["objects"].items()):
+                class_labels = format_labels(labels, model=name)
+                lines.append(f"{prefix}_model_objects_total{class_labels} {n}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Returns one line naming the stages from slowest to fastest."""
+        return ", ".join(
+            f"{name} {seconds * 1000:.1f}ms"
+            for name, seconds in sorted(
+                self.timings.items(), key=lambda item: item[1], reverse=True
+            )
+        )
+
+    def memory_summary(self, limit=6):
+        """Returns one line naming the limit stages with the largest peaks."""
+        largest = sorted(self.peaks.items(), key=lambda item: item[1], reverse=True)
+        return ", ".join(
+            f"{name} {format_bytes(peak)} peak/{format_bytes(self.retained[name])} kept"
+            for name, peak in largest[:limit]
+        )
+
+
+def format_bytes(n):
+    if abs(n) < 1024 * 1024:
+        return f"{n / 1024:.0f}KB"
+    return f"{n / 1024 / 1024:.1f}MB"
+
+
+def format_labels(labels, **extra):
+    labels = dict(labels or {}, **extra)
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return "{" + pairs + "}"
+
+
+def timed(name):
+    """Returns a context manager that times a stage of the active Metrics."""
+    if _active is None:
+        return NULL_STAGE
+    return Stage(_active, name)
+
+
+def record(name, seconds):
+    """Adds seconds, timed by the caller, to a stage of the active Metrics.
+    For code run hundreds of times per game, where a timed() block would
+    cost too much."""
+    if _active is not None:
+        _active.record(name, seconds)
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def active():
+    """Returns the active Metrics, or None."""
+    return _active
+
+
+def profile(func, *args, limit=30, sort="cumulative", dump_path=None):
+    """Calls func(*args) under cProfile. Returns its result and a report of
+    the limit functions that took longest by sort, and saves the raw
+    profile to dump_path (for snakeviz or pstats) if given."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    if dump_path:
+        profiler.dump_stats(dump_path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
@@ -1,7 +1,9 @@
-from .scoring import get_scoring
+from .scoring import get_scoring, is_eager, normalize_description
 
 
 class Runner:
+    __slots__ = ("id", "start", "end", "event_num", "out", "to_score")
+
     def __init__(self, id, start, end, event_num, out=False):
         self.id = id
         self.start = start
@@ -21,44 +23,50 @@ class Runner:
         elif self.to_score:
             retval += " will score"
         return retval
-        return str(self.__dict__)
 
     def __repr__(self):
         return self.__str__()
 
 
-class Iter:
-    def __init__(self, array):
-        self.array = array
-
-    def __iter__(self):
-        self._n = 0
-        return self
-
-    def __next__(self):
-        if self._n < len(self.array):
-            ret_val = self.array[self._n]
-            self._n += 1
-            return ret_val
-        else:
-            raise StopIteration
-
+class Game:
+    __slots__ = (
+        "game_pk",
+        "date",
+        "in_progress",
+        "innings",
+        "away",
+        "home",
+        "players",
+        "link",
+    )
 
-class Game(Iter):
     def __init__(self):
+        self.game_pk = None
+        # The official date, as YYYY-MM-DD
+        self.date = None
         self.in_progress = False
         self.innings = []
-        Iter.__init__(self, self.innings)
+        self.away = None
+        self.home = None
+        self.players = {}
+        self.link = None
+
+    def __iter__(self):
+        return iter(self.innings)
 
     def add_inning(self, inning):
         self.innings.append(inning)
 
 
-class Inning(Iter):
+class Inning:
+    __slots__ = ("num", "halves")
+
     def __init__(self, num):
         self.num = int(num)
         self.halves = []
-        Iter.__init__(self, self.halves)
+
+    def __iter__(self):
+        return iter(self.halves)
 
     def add_half(self, half_inning):
         if not self.halves:
@@ -72,11 +80,16 @@ class Inning(Iter):
         return "Inning %d" % (self.num)
 
 
-class HalfInning(Iter):
+class HalfInning:
+    __slots__ = ("num", "atbats", "action_buffer")
+
     def __init__(self):
+        self.num = None
         self.atbats = []
         self.init_action_buffer()
-        Iter.__init__(self, self.atbats)
+
+    def __iter__(self):
+        return iter(self.atbats)
 
     def init_action_buffer(self):
         self.action_buffer = []
@@ -97,6 +110,25 @@ class HalfInning(Iter):
 
 
 class AtBat:
+    __slots__ = (
+        "pa_num",
+        "event_num",
+        "batter",
+        "_des",
+        "_des_normalized",
+        "event",
+        "pitcher",
+        "outs",
+        "mid_pa_runners",
+        "runners",
+        "_mid_pa_runners_by_id",
+        "_runners_by_id",
+        "home_score",
+        "away_score",
+        "actions",
+        "_scoring",
+    )
+
     def __init__(
         self,
         pa_num,
@@ -130,11 +162,56 @@ class AtBat:
         else:
             self.runners = list()
 
+        # The first runner added for each player id, so that runners listed
+        # once per base they advance can be merged without a linear scan.
+        self._mid_pa_runners_by_id = {}
+        for r in self.mid_pa_runners:
+            self._mid_pa_runners_by_id.setdefault(r.id, r)
+        self._runners_by_id = {}
+        for r in self.runners:
+            self._runners_by_id.setdefault(r.id, r)
+
         self.home_score = home_score
         self.away_score = away_score
 
         self.actions = []
-        self.scoring = get_scoring(self)
+        self._scoring = None
+        if is_eager(event):
+            self._scoring = get_scoring(self)
+
+    @property
+    def des(self):
+        """The play description, normalized on first access."""
+        if not self._des_normalized:
+            self._des = normalize_description(self._des)
+            self._des_normalized = True
+        return self._des
+
+    @des.setter
+    def des(self, des):
+        self._des = des
+        self._des_normalized = False
+        self._scoring = None
+
+    @property
+    def scoring(self):
+        """Computed on first access, so callers that never look at the
+        scoring skip the description parsing entirely. Descriptions that
+        can't be scored raise here (see score())."""
+        if self._scoring is None:
+            self._scoring = get_scoring(self)
+        return self._scoring
+
+    @scoring.setter
+    def scoring(self, scoring):
+        """For scorings saved earlier. Set des first, since setting it
+        clears the scoring."""
+        self._scoring = scoring
+
+    def score(self):
+        """Computes the scoring now rather than on first access, and
+        returns it."""
+        return self.scoring
 
     def get_action_by_event_num(self, event_num):
         for action in self.actions:
@@ -142,29 +219,37 @@ class AtBat:
                 return action
         raise KeyError
 
+    def get_runner(self, id):
+        """Returns the first runner added with this player id that is on base
+        when the at-bat ends, or None."""
+        return self._runners_by_id.get(id)
+
     def add_mid_pa_runner(self, runner):
-        already_added = False
-        for r in self.mid_pa_runners:
-            if r.id == runner.id:
-                already_added = True
-                if runner.start < r.start:
-                    r.start = runner.start
-                elif runner.end > r.end:
-                    r.end = runner.end
-        if not already_added:
-            self.mid_pa_runners.append(runner)
+        r = self._mid_pa_runners_by_id.get(runner.id)
+        if r:
+            if runner.start < r.start:
+                r.start = runner.start
+            elif runner.end > r.end:
+                r.end = runner.end
+        else:
+            self._append_mid_pa_runner(runner)
 
     def add_atbat_runner(self, runner):
         self.runners.append(runner)
+        self._runners_by_id.setdefault(runner.id, runner)
 
     def add_runner(self, runner):
         if runner.event_num < self.event_num:
-            self.mid_pa_runners.append(runner)
+            self._append_mid_pa_runner(runner)
         elif runner.event_num == self.event_num:
-            self.runners.append(runner)
+            self.add_atbat_runner(runner)
         else:
             raise Exception("Runner bad ordering")
 
+    def _append_mid_pa_runner(self, runner):
+        self.mid_pa_runners.append(runner)
+        self._mid_pa_runners_by_id.setdefault(runner.id, runner)
+
     def add_action(self, action):
         self.actions.append(action)
 
@@ -195,6 +280,8 @@ class AtBat:
 
 
 class Player:
+    __slots__ = ("id", "name")
+
     def __init__(self, id, name):
         self.id = id
         self.name = name
@@ -20,23 +20,32 @@ class GameParser:
                 active_half = HalfInning()
                 active_inning.add_half(active_half)
 
-            ab = AtBat(
-                int(play["atBatIndex"]),
-                int(play["atBatIndex"]),
-                int(play["matchup"]["batter"]["id"]),
-                self.build_description(play),
-                play["result"].get("eventType", "game_advisory"),
-                int(play["matchup"]["pitcher"]["id"]),
-                int(play["count"]["outs"]),
-                int(play["result"]["homeScore"]),
-                int(play["result"]["awayScore"]),
-            )
-
-            self.parse_runners(ab, play)
-            active_half.add_atbat(ab)
+            active_half.add_atbat(self.parse_atbat(play))
 
         return game
 
+    def parse_half_inning(self, plays):
+        """Parses the plays of a single half-inning on their own."""
+        half_inning = HalfInning()
+        for play in plays:
+            half_inning.add_atbat(self.parse_atbat(play))
+        return half_inning
+
+    def parse_atbat(self, play):
+        ab = AtBat(
+            int(play["atBatIndex"]),
+            int(play["atBatIndex"]),
+            int(play["matchup"]["batter"]["id"]),
+            self.build_description(play),
+            play["result"].get("eventType", "game_advisory"),
+            int(play["matchup"]["pitcher"]["id"]),
+            int(play["count"]["outs"]),
+            int(play["result"]["homeScore"]),
+            int(play["result"]["awayScore"]),
+        )
+        self.parse_runners(ab, play)
+        return ab
+
     def build_description(self, play):
         descriptions = []
         action_index = set(play["actionIndex"])
@@ -67,20 +76,19 @@ class GameParser:
 
             # Runners that advance multiple bases are listed for each base they
             # advance. Only create one Runner object per person.
-            already_added = False
             play_index = int(runner["details"]["playIndex"])
             runner_id = runner["details"]["runner"]["id"]
-            for ab_runner in ab.runners:
-                if ab_runner.id == runner_id and play_index + 1 == num_events:
-                    if end > ab_runner.end:
-                        ab_runner.end = end  # Increase end
-                    if start < ab_runner.start:
-                        ab_runner.start = start  # Decrease start
-                    ab_runner.out = mvmt["isOut"]
-                    already_added = True
-                    break
+            ab_runner = None
+            if play_index + 1 == num_events:
+                ab_runner = ab.get_runner(runner_id)
 
-            if not already_added:
+            if ab_runner:
+                if end > ab_runner.end:
+                    ab_runner.end = end  # Increase end
+                if start < ab_runner.start:
+                    ab_runner.start = start  # Decrease start
+                ab_runner.out = mvmt["isOut"]
+            else:
                 r = Runner(runner_id, start, end, play_index)
                 r.out = mvmt["isOut"]
 
@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+
+from .models import Player
+
+HELD_RUNNER_ID = 0
+
+
+class PlayerRegistry:
+    """Interns Player objects by id, so that every game built with the same
+    registry shares one Player per person instead of creating its own.
+
+    A player whose name changes gets a new Player, leaving games that were
+    already built untouched. Given a path, the registry starts from the
+    players saved there and save() writes them back."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.players = {HELD_RUNNER_ID: Player(HELD_RUNNER_ID, "Held Runner")}
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.players)
+
+    def get(self, id, name):
+        """Returns the Player for id, creating it if it is new or its name
+        changed."""
+        player = self.players.get(id)
+        if player is None or player.name != name:
+            player = self.players[id] = Player(id, name)
+        return player
+
+    def parse_players(self, player_dict):
+        """Returns a game's players by id, from gameData.players."""
+        players = {HELD_RUNNER_ID: self.players[HELD_RUNNER_ID]}
+        for player in player_dict.values():
+            id = player["id"]
+            players[id] = self.get(id, player["initLastName"])
+        return players
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            for id, name in json.load(f).items():
+                self.get(int(id), name)
+
+    def save(self, path=None):
+        path = path or self.path
+        names = {id: player.name for id, player in self.players.items() if id}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(names, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+# Shared by every GameBuilder that isn't given a registry of its own
+default_registry = PlayerRegistry()
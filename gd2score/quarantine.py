@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+
+from .atomic import atomic_write
+from .feed_source import DirectorySource, get_game_id
+
+TRACEBACK_SUFFIX = ".txt"
+
+
+class GameFailure:
+    """What a worker returns instead of its result when a game fails: the
+    last line of the traceback, and whether the feed was quarantined."""
+
+    def __init__(self, game_id, error, quarantined):
+        self.game_id = game_id
+        self.error = error
+        self.quarantined = quarantined
+
+
+class Quarantine:
+    """A directory of games that failed to render. Each one is kept as its
+    feed, <gamePk>.json.gz (when the feed could be read at all), and its
+    traceback, <gamePk>.txt.
+
+    The directory can be rendered again as a DirectorySource once the cause
+    is fixed; games are taken out as soon as they render."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, game_id, feed, traceback_text):
+        if feed is not None:
+            self.write(
+                self.get_feed_path(game_id),
+                gzip.compress(json.dumps(feed, separators=(",", ":")).encode()),
+            )
+        self.write(self.get_traceback_path(game_id), traceback_text.encode())
+
+    def remove(self, game_id):
+        for path in (self.get_feed_path(game_id), self.get_traceback_path(game_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, game_id):
+        return os.path.exists(self.get_traceback_path(game_id))
+
+    def game_ids(self):
+        """Returns the quarantined games that have a feed to replay."""
+        return sorted(
+            game_id
+            for game_id in map(get_game_id, os.listdir(self.directory))
+            if game_id is not None
+        )
+
+    def source(self, selective=False, stream=False):
+        return DirectorySource(self.directory, selective, stream)
+
+    def get_traceback(self, game_id):
+        with open(self.get_traceback_path(game_id), encoding="utf-8") as f:
+            return f.read()
+
+    def get_feed_path(self, game_id):
+        return os.path.join(self.directory, f"{game_id}.json.gz")
+
+    def get_traceback_path(self, game_id):
+        return os.path.join(self.directory, f"{game_id}{TRACEBACK_SUFFIX}")
+
+    def write(self, path, data):
+        # Replaying renders from these files, so never leave one half written
+        with atomic_write(path) as f:
+            f.write(data)
@@ -0,0 +1,478 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import logging
+import os
+import time
+import traceback
+
+from .atomic import atomic_write
+from .build_game import GameBuilder
+from .draw_scorecard import DrawScorecard
+from .feed_cache import FeedCache
+from . import game_archive
+from .manifest import hash_feed
+from .metrics import Metrics, count, format_bytes, timed
+from .quarantine import GameFailure
+from .schedule_index import ScheduleIndex
+from .season_archive import SeasonArchive
+
+# Each worker process builds its own GameRenderer once and reuses it for
+# every game it is handed.
+_game_renderer = None
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+def get_feed_cache(cache_dir, source):
+    """Returns a FeedCache that reads feeds the way source does."""
+    return FeedCache(cache_dir, selective=source.selective, stream=source.stream)
+
+
+class GameRenderer:
+    def __init__(
+        self,
+        source,
+        cache_dir=None,
+        draw_options=None,
+        memory=False,
+        quarantine=None,
+        archive_dir=None,
+        memory_budget=None,
+    ):
+        cache = get_feed_cache(cache_dir, source) if cache_dir else None
+        self.game_builder = GameBuilder(source, cache)
+        self.draw_scorecard = DrawScorecard(**(draw_options or {}))
+        self.memory = memory
+        self.metrics = Metrics(memory)
+        self.quarantine = quarantine
+        self.archive_dir = archive_dir
+        self.season_archive = None
+        self.memory_budget = memory_budget
+        self.feed = None
+        self.written = None
+
+    def measure(self):
+        """Starts a new Metrics, self.metrics, for the next game."""
+        self.metrics = Metrics(self.memory)
+        self.written = None
+        return self.metrics.activate()
+
+    def check_budget(self):
+        """Fails the game just measured if it peaked over memory_budget,
+        taking back its scorecard."""
+        peak = self.metrics.peak
+        if self.memory_budget and peak > self.memory_budget:
+            if self.written:
+                os.remove(self.written)
+            raise MemoryBudgetExceeded(
+                f"Peaked at {format_bytes(peak)}, over the "
+                f"{format_bytes(self.memory_budget)} budget"
+            )
+
+    def render(self, game_id, out_dir):
+        with self.measure():
+            feed = self.get_feed(game_id)
+            return self.write(self.build(feed), out_dir)
+
+    def render_changed(self, game_id, out_dir, known_hash):
+        """Renders a game unless its feed still hashes to known_hash and its
+        scorecard (and archive, with an archive_dir) exists. Returns the path
+        written (None if skipped) and the feed hash."""
+        with self.measure():
+            feed = self.get_feed(game_id)
+            with timed("hash"):
+                feed_hash = hash_feed(feed)
+            paths = [self.get_path(game_id, out_dir)]
+            if self.archive_dir:
+                paths.append(game_archive.get_archive_path(self.archive_dir, game_id))
+            if feed_hash == known_hash and all(map(os.path.exists, paths)):
+                count("unchanged")
+                return None, feed_hash
+            return self.write(self.build(feed), out_dir), feed_hash
+
+    def redraw(self, game_id, out_dir):
+        """Renders a game from its archive, without its feed."""
+        with self.measure():
+            with timed("load"):
+                game = self.load(game_id)
+            return self.write(game, out_dir)
+
+    def load(self, game_id):
+        """Loads a game from archive_dir, which may also be a season
+        archive."""
+        player_registry = self.game_builder.player_registry
+        if os.path.isfile(self.archive_dir):
+            if self.season_archive is None:
+                self.season_archive = SeasonArchive(self.archive_dir)
+            return self.season_archive.load(game_id, player_registry)
+        path = game_archive.get_archive_path(self.archive_dir, game_id)
+        return game_archive.load(path, player_registry)
+
+    def build(self, feed):
+        """Builds the game and archives it, if there is an archive_dir."""
+        game = self.game_builder.build_from_feed(feed)
+        if self.archive_dir:
+            with timed("archive"):
+                path = game_archive.get_archive_path(self.archive_dir, game.game_pk)
+                game_archive.save(game, path)
+        return game
+
+    def get_feed(self, game_id):
+        # Kept to quarantine along with a failure
+        self.feed = None
+        self.feed = self.game_builder.get_feed(game_id)
+        return self.feed
+
+    def write(self, game, out_dir):
+        path = self.get_path(game.game_pk, out_dir)
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            self.draw_scorecard.draw_to(game, f)
+        self.written = path
+        return path
+
+    def fail(self, game_id, error):
+        """Quarantines the game that was being rendered, with its feed if
+        it got that far, and returns a GameFailure."""
+        traceback_text = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+        self.quarantine.add(game_id, self.feed, traceback_text)
+        return GameFailure(game_id, describe_error(error), self.feed is not None)
+
+    def get_path(self, game_id, out_dir):
+        return os.path.join(out_dir, f"{game_id}.svg")
+
+
+def init_worker(
+    source,
+    cache_dir,
+    draw_options=None,
+    memory=False,
+    quarantine=None,
+    archive_dir=None,
+    memory_budget=None,
+):
+    global _game_renderer
+    _game_renderer = GameRenderer(
+        source, cache_dir, draw_options, memory, quarantine, archive_dir, memory_budget
+    )
+
+
+def render_game(game_id, out_dir):
+    return run_isolated(game_id, _game_renderer.render, game_id, out_dir)
+
+
+def redraw_game(game_id, out_dir):
+    return run_isolated(game_id, _game_renderer.redraw, game_id, out_dir)
+
+
+def render_changed_game(game_id, out_dir, known_hash):
+    return run_isolated(
+        game_id, _game_renderer.render_changed, game_id, out_dir, known_hash
+    )
+
+
+def describe_error(error):
+    """Describes an exception in one line, with where it was raised, since
+    the asserts don't have messages."""
+    frame = traceback.extract_tb(error.__traceback__)[-1]
+    where = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+    if str(error):
+        return f"{type(error).__name__}: {error} ({where})"
+    return f"{type(error).__name__} ({where})"
+
+
+def run_isolated(game_id, func, *args):
+    """Calls a GameRenderer method and returns its result along with the
+    game's metrics, as a dict. With a quarantine, a game that fails is
+    quarantined and its result is a GameFailure, leaving the worker ready
+    for the next game. Going over the renderer's memory_budget, if it has
+    one, counts as failing."""
+    try:
+        result = func(*args)
+        _game_renderer.check_budget()
+    except Exception as e:
+        if _game_renderer.quarantine is None:
+            raise
+        result = _game_renderer.fail(game_id, e)
+    finally:
+        _game_renderer.feed = None
+    return result, _game_renderer.metrics.as_dict()
+
+
+class SeasonRenderer:
+    """Renders every game scheduled in a date range to <out_dir>/<gamePk>.svg,
+    spreading the games over a pool of jobs processes.
+
+    Given an AsyncFeedFetcher, feeds missing from the cache are downloaded
+    concurrently up front and each game is handed to the pool as soon as its
+    feed lands in the cache, so downloads overlap with rendering.
+
+    Games are looked up in schedule_index (by default an in-memory
+    ScheduleIndex of source), final games only if final_only is set.
+    draw_options are passed on to DrawScorecard.
+
+    Given a Manifest, games whose feed and renderer haven't changed since
+    they were last rendered are skipped, and each finished game is recorded
+    right away so an interrupted batch picks up where it stopped.
+
+    The stage timings and counts of every game are added up in
+    self.metrics, and written as a JSON line per game to metrics_path if
+    given. memory=True measures each stage's memory too (see Metrics), and
+    a memory_budget in bytes (which implies it) logs a warning for every
+    game whose peak goes over it. With enforce_budget, such a game also
+    fails: its scorecard is removed and it is handled like any other
+    failure.
+
+    Given a Quarantine, a game that fails is logged and quarantined and the
+    batch carries on; without one, the first failure stops the batch.
+    Quarantined games that render are taken out of the quarantine.
+
+    Given an archive_dir, every game built is also saved there with
+    game_archive, and redraw() renders the games saved there without
+    their feeds. redraw() also takes a season archive (see season_archive)
+    as archive_dir."""
+
+    def __init__(
+        self,
+        source,
+        out_dir,
+        cache_dir=None,
+        jobs=1,
+        fetcher=None,
+        draw_options=None,
+        schedule_index=None,
+        final_only=False,
+        manifest=None,
+        metrics_path=None,
+        memory=False,
+        memory_budget=None,
+        quarantine=None,
+        archive_dir=None,
+        enforce_budget=False,
+    ):
+        self.source = source
+        self.out_dir = out_dir
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.fetcher = fetcher
+        self.draw_options = draw_options
+        self.schedule_index = schedule_index or ScheduleIndex(source)
+        self.final_only = final_only
+        self.manifest = manifest
+        self.metrics_path = metrics_path
+        self.memory = memory or bool(memory_budget)
+        self.memory_budget = memory_budget
+        self.enforce_budget = enforce_budget
+        self.metrics = Metrics(self.memory)
+        self.metrics_file = None
+        self.quarantine = quarantine
+        self.archive_dir = archive_dir
+        self.from_archive = False
+        if fetcher and not cache_dir:
+            raise ValueError("Fetching ahead requires a cache directory")
+
+    def render(self, start_date, end_date):
+        games = self.schedule_index.schedule(start_date, end_date, self.final_only)
+        game_ids = sorted(set(g["game_id"] for g in games))
+        return self.render_games(game_ids)
+
+    def redraw(self, game_ids=None):
+        """Renders games from archive_dir, by default all of them. The
+        manifest isn't consulted, since archived games have no feed."""
+        if game_ids is None and os.path.isfile(self.archive_dir):
+            with SeasonArchive(self.archive_dir) as season_archive:
+                game_ids = sorted(season_archive.game_ids())
+        elif game_ids is None:
+            game_ids = sorted(
+                int(name[: -len(game_archive.SUFFIX)])
+                for name in os.listdir(self.archive_dir)
+                if name.endswith(game_archive.SUFFIX)
+            )
+        self.from_archive = True
+        try:
+            return self.render_games(game_ids)
+        finally:
+            self.from_archive = False
+
+    def render_games(self, game_ids):
+        os.makedirs(self.out_dir, exist_ok=True)
+        start = time.perf_counter()
+        self.unchanged = 0
+        self.over_budget = 0
+        self.failed = []
+        self.metrics = Metrics(self.memory)
+        if self.metrics_path:
+            self.metrics_file = open(self.metrics_path, "a", encoding="utf-8")
+        try:
+            if self.fetcher:
+                with self.get_executor() as executor:
+                    asyncio.run(self.fetch_and_render(game_ids, executor))
+            elif self.jobs == 1:
+                init_worker(*self.get_worker_args())
+                for game_id in game_ids:
+                    func, *args = self.get_task(game_id)
+                    self.finish(game_id, func(*args))
+            else:
+                with self.get_executor() as executor:
+                    futures = [
+                        executor.submit(*self.get_task(game_id)) for game_id in game_ids
+                    ]
+                    for game_id, future in zip(game_ids, futures):
+                        self.finish(game_id, future.result())
+        finally:
+            if self.manifest:
+                self.manifest.compact()
+            if self.metrics_file:
+                self.metrics_file.close()
+                self.metrics_file = None
+        elapsed = time.perf_counter() - start
+
+        rendered = len(game_ids) - self.unchanged - len(self.failed)
+        logging.info(
+            "Rendered %d games in %.1fs (%.1f games/sec), %d unchanged, %d failed",
+            rendered,
+            elapsed,
+            rendered / elapsed if elapsed else 0,
+            self.unchanged,
+            len(self.failed),
+        )
+        logging.info("Stage times: %s", self.metrics.summary())
+        if self.memory:
+            logging.info("Largest memory use: %s", self.metrics.memory_summary())
+        if self.failed:
+            logging.warning(
+                "%d games failed and were quarantined in %s",
+                len(self.failed),
+                self.quarantine.directory,
+            )
+        if self.over_budget:
+            logging.warning(
+                "%d games went over the %s memory budget",
+                self.over_budget,
+                format_bytes(self.memory_budget),
+            )
+        return len(game_ids), elapsed
+
+    async def fetch_and_render(self, game_ids, executor):
+        loop = asyncio.get_running_loop()
+        cache = get_feed_cache(self.cache_dir, self.source)
+        renders = {}
+
+        def render(game_id):
+            renders[game_id] = loop.run_in_executor(executor, *self.get_task(game_id))
+
+        missing = []
+        for game_id in game_ids:
+            if cache.contains(game_id):
+                render(game_id)
+            else:
+                missing.append(game_id)
+
+        async with self.fetcher:
+            feeds = self.fetcher.iter_feeds(missing, bool(self.quarantine))
+            async for game_id, feed in feeds:
+                if isinstance(feed, Exception):
+                    self.fail_fetch(game_id, feed)
+                    continue
+                await loop.run_in_executor(None, cache.put, game_id, feed)
+                render(game_id)
+
+        for game_id in game_ids:
+            if game_id in renders:
+                self.finish(game_id, await renders[game_id])
+
+    def fail_fetch(self, game_id, error):
+        """Quarantines a game whose feed couldn't be downloaded, with just
+        its traceback."""
+        traceback_text = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+        self.quarantine.add(game_id, None, traceback_text)
+        self.failed.append(game_id)
+        logging.error(
+            "Failed to fetch %d, quarantined in %s: %s",
+            game_id,
+            self.quarantine.directory,
+            describe_error(error),
+        )
+
+    def get_task(self, game_id):
+        """Returns the worker function and arguments that render game_id."""
+        if self.from_archive:
+            return redraw_game, game_id, self.out_dir
+        if self.manifest:
+            known_hash = self.manifest.get_hash(game_id)
+            return render_changed_game, game_id, self.out_dir, known_hash
+        return render_game, game_id, self.out_dir
+
+    def finish(self, game_id, result):
+        result, metrics = result
+        self.record_metrics(game_id, Metrics.from_dict(metrics))
+        if isinstance(result, GameFailure):
+            self.failed.append(game_id)
+            logging.error(
+                "Failed %d, quarantined in %s: %s",
+                game_id,
+                self.quarantine.directory,
+                result.error,
+            )
+            return
+        if self.quarantine:
+            self.quarantine.remove(game_id)
+        if self.manifest and not self.from_archive:
+            path, feed_hash = result
+            self.manifest.record(game_id, feed_hash)
+            if path is None:
+                self.unchanged += 1
+                logging.debug("Skipped unchanged %d", game_id)
+                return
+        else:
+            path = result
+        self.log_rendered(game_id, path)
+
+    def record_metrics(self, game_id, metrics):
+        self.metrics.add(metrics)
+        if self.memory_budget and metrics.peak > self.memory_budget:
+            self.over_budget += 1
+            logging.warning(
+                "Game %d peaked at %s, over the %s budget: %s",
+                game_id,
+                format_bytes(metrics.peak),
+                format_bytes(self.memory_budget),
+                metrics.memory_summary(),
+            )
+        if self.metrics_file:
+            self.metrics_file.write(metrics.to_json(game_id=game_id) + "\n")
+
+    @contextmanager
+    def get_executor(self):
+        with ProcessPoolExecutor(
+            self.jobs,
+            initializer=init_worker,
+            initargs=self.get_worker_args(),
+        ) as executor:
+            try:
+                yield executor
+            except BaseException:
+                # Every game is submitted up front; don't render the rest of
+                # the season before the error gets out
+                executor.shutdown(cancel_futures=True)
+                raise
+
+    def get_worker_args(self):
+        return (
+            self.source,
+            self.cache_dir,
+            self.draw_options,
+            self.memory,
+            self.quarantine,
+            self.archive_dir,
+            self.memory_budget if self.enforce_budget else None,
+        )
+
+    def log_rendered(self, game_id, path):
+        logging.info("Rendered %d to %s", game_id, path)
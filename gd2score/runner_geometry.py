@@ -0,0 +1,123 @@
+"""Positions of the runner lines and their end marks.
+
+Every runner is drawn as a segment in its at-bat's row. Mid-PA runners split
+the top half of the row into one band per event; the runners at the end of
+the at-bat go to the bottom of the row, starting where a runner who stayed
+put after the last mid-PA event left off. Runners put out are shortened by
+OUT_SHORTEN and get an X, turned to follow the line, in place of a dot.
+"""
+
+from itertools import groupby
+from operator import attrgetter
+import math
+
+from .constants import (
+    ORIGIN_X,
+    ATBAT_HT,
+    NAME_W,
+    SCORE_W,
+    BASE_L,
+    OUT_SHORTEN,
+)
+
+BASES_X = ORIGIN_X + NAME_W + SCORE_W
+
+
+class RunnerSegment:
+    """A runner's line from (x1, y1) to (x2, y2), in unflipped coordinates.
+    The end mark sits at (x2, y2); angle is the rotation of an out mark in
+    degrees, or None if it isn't rotated."""
+
+    __slots__ = ("x1", "y1", "x2", "y2", "out", "to_score", "angle")
+
+    def __init__(self, x1, y1, x2, y2, out, to_score, angle=None):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.out = out
+        self.to_score = to_score
+        self.angle = angle
+
+
+def get_game_segments(game, layout):
+    """Returns a dict from each AtBat of game to its runner segments, in
+    drawing order."""
+    segments = {}
+    for inning in game.innings:
+        for half_inning in inning.halves:
+            for atbat in half_inning.atbats:
+                segments[atbat] = get_atbat_segments(atbat, layout.atbat_ys[atbat])
+    return segments
+
+
+def get_atbat_segments(atbat, y):
+    segments = []
+    # Not-out runners of the last mid-PA event, by the base they reached
+    held_runners = {}
+    mid_pa_runners = atbat.mid_pa_runners
+    if mid_pa_runners:
+        event_nums = [r.event_num for r in mid_pa_runners]
+        y_step = ATBAT_HT / 2 / len(set(event_nums))
+        for i, (_, group) in enumerate(
+            groupby(mid_pa_runners, attrgetter("event_num"))
+        ):
+            y_start = y - ATBAT_HT + i * y_step
+            y_end = y_start + y_step
+            for runner in sorted(group, key=attrgetter("end")):
+                segments.append(
+                    get_segment(
+                        runner,
+                        BASES_X + BASE_L * runner.start,
+                        y_start,
+                        BASES_X + BASE_L * runner.end,
+                        y_end,
+                    )
+                )
+
+        last_event_num = max(event_nums)
+        for runner in mid_pa_runners:
+            if not runner.out and runner.event_num == last_event_num:
+                held_runners.setdefault(runner.end, []).append(runner)
+
+    for runner in atbat.runners:
+        if runner.id == atbat.batter:
+            x_start = ORIGIN_X + NAME_W
+            x_end = x_start + SCORE_W + BASE_L * runner.end
+            segments.append(get_segment(runner, x_start, y, x_end, y))
+            continue
+
+        x_start = BASES_X + BASE_L * runner.start
+        y_start = y - ATBAT_HT
+        held = held_runners.get(runner.start, ())
+        assert len(held) in (0, 1)
+        if held:
+            x_start = BASES_X + BASE_L * held[0].end
+            y_start = y - ATBAT_HT / 2
+        segments.append(
+            get_segment(runner, x_start, y_start, BASES_X + BASE_L * runner.end, y)
+        )
+    return segments
+
+
+def get_segment(runner, x1, y1, x2, y2):
+    if not runner.out:
+        return RunnerSegment(x1, y1, x2, y2, False, runner.to_score)
+
+    if x1 != x2:
+        length = math.hypot(x2 - x1, y2 - y1) - OUT_SHORTEN
+        # The round trip through degrees looks redundant, but it is how the
+        # svgwrite version got the angle. For some angles it changes the last
+        # bit, and x2 and y2 are written with full precision, so dropping it
+        # could change the SVG text.
+        radians = math.radians(math.degrees(math.atan((y2 - y1) / (x2 - x1))))
+        x2 = x1 + length * math.cos(radians)
+        y2 = y1 + length * math.sin(radians)
+    else:
+        y2 = y2 - OUT_SHORTEN
+
+    # The mark follows the shortened line
+    angle = None
+    if x1 != x2:
+        angle = math.degrees(math.atan((y2 - y1) / (x2 - x1)))
+    return RunnerSegment(x1, y1, x2, y2, True, runner.to_score, angle)
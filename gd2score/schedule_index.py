@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from itertools import groupby
+import json
+import os
+import tempfile
+
+from .feed_source import schedule_entry, to_date
+
+FINAL_STATUSES = ("Final", "Game Over", "Completed Early")
+# Games in these states won't change any more, so their dates need not be
+# fetched again
+SETTLED_STATUSES = FINAL_STATUSES + ("Postponed", "Cancelled")
+
+
+def is_final(game):
+    return game["status"].startswith(FINAL_STATUSES)
+
+
+def is_settled(game):
+    return game["status"].startswith(SETTLED_STATUSES)
+
+
+class ScheduleIndex:
+    """Keeps the games of each date (gamePk, status and teams) from a
+    source's schedule, optionally saved as JSON at path.
+
+    Dates not in the index are fetched in bulk, one request per run of
+    consecutive missing dates, so a season takes a single request. Past
+    dates whose games are all final, postponed or cancelled are kept for
+    good, off-days included; any other date is fetched again next time."""
+
+    def __init__(self, source, path=None):
+        self.source = source
+        self.path = path
+        self.dates = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.dates = json.load(f)["dates"]
+
+    def schedule(self, start_date, end_date, final_only=False):
+        """Returns the games between two dates (inclusive) as schedule_entry
+        dicts, final games only if final_only is set."""
+        days = self.get_days(to_date(start_date), to_date(end_date))
+        missing = [day for day in days if day.isoformat() not in self.dates]
+        fetched = self.fetch(missing) if missing else {}
+
+        games = []
+        for day in days:
+            day = day.isoformat()
+            games.extend(fetched[day] if day in fetched else self.dates[day])
+        if final_only:
+            games = [game for game in games if is_final(game)]
+        return games
+
+    def get_days(self, start_date, end_date):
+        return [
+            start_date + timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+        ]
+
+    def fetch(self, days):
+        """Fetches the games of days, adding the dates that are settled to
+        the index, and returns them by date."""
+        fetched = {}
+        # Consecutive days have a constant difference from their index
+        for _, run in groupby(enumerate(days), lambda d: d[1].toordinal() - d[0]):
+            run = [day for _, day in run]
+            by_date = {day.isoformat(): [] for day in run}
+            for game in self.source.schedule(run[0], run[-1]):
+                game_date = to_date(game["game_date"]).isoformat()
+                if game_date in by_date:
+                    by_date[game_date].append(
+                        schedule_entry(
+                            game["game_id"],
+                            game_date,
+                            game["status"],
+                            game["away_name"],
+                            game["home_name"],
+                        )
+                    )
+            fetched.update(by_date)
+
+        today = date.today().isoformat()
+        settled = {
+            day: games
+            for day, games in fetched.items()
+            if day < today and all(is_settled(game) for game in games)
+        }
+        if settled:
+            self.dates.update(settled)
+            if self.path:
+                self.save()
+        return fetched
+
+    def save(self):
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path) or ".", suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"dates": self.dates}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -42,215 +42,298 @@ OUT_TYPES = {
     "grounds out": "G",
 }
 
-POS = "(\w+ fielder|\w+ baseman|shortstop|pitcher|catcher|fan interference|1B|2B|3B)"
+POS = r"(\w+ fielder|\w+ baseman|shortstop|pitcher|catcher|fan interference|1B|2B|3B)"
 ERROR_TYPES = "(?:interference|fielding|missed catch|throwing|reaches on an)"
 OUT = "(%s)" % "|".join(OUT_TYPES.keys())
 AIR = "(%s)" % "|".join(AIR_TYPES.keys())
 HIT = "(%s)" % "|".join(HIT_BALLS.keys())
 
+# Patterns are compiled once here rather than rebuilt for every at-bat.
+DES_FIX_RE = re.compile(r"\s,(\w)")  # 5/12  ' ,w' -> ', w'
+CATCHER_INTERF_RE = re.compile("reaches on catcher interference")
+GIDP_RE = re.compile("double play, " + POS)
+FORCE_OUT_RE = re.compile(AIR + r" into a force out, (?:fielded by\s)?" + POS)
+SAC_FLY_RE = re.compile("sacrifice fly(?:,| to) " + POS)
+SAC_FLY_ERROR_RE = re.compile(r"sacrifice fly.\s+Fielding error by (\w+ fielder)")
+SAC_DP_RE = re.compile(
+    AIR + " into a sacrifice double play(?: in foul territory)?, " + POS
+)
+SAC_BUNT_RE = re.compile(r"sacrifice bunt(?:,|\sto) " + POS)
+# ', ' or ' sharply, ' or ' sharply to ' or ' to '
+FIELD_OUT_RE = re.compile(OUT + r"(?:,\s|\s\w+,\s|\s\w+\sto\s|\sto\s|\son\s)" + POS)
+OUT_RE = re.compile(OUT)
+DP_RE = re.compile(
+    AIR
+    + r" into a(?:n unassisted|\sfielder's choice)? "
+    + r"(?:double|triple) play(?:\sin foul territory)?, "
+    + POS
+)
+DOUBLE_PLAY_RE = re.compile("Double play")
+HIT_RE = re.compile(HIT)
+HIT_TO_RE = re.compile(HIT + " to " + POS)
+SINGLES_ON_RE = re.compile(r"singles on a (\w+\s)?(\w+ \w+)\.")
+DOUBLES_RE = re.compile(r"doubles\.")
+FIELD_ERROR_RE = re.compile(ERROR_TYPES + " error by " + POS)
+FIELDED_BY_RE = re.compile(r"(?:fielded by\s)?" + POS)
+FIELDERS_CHOICE_RE = re.compile(
+    r"reaches on a fielder's choice(?:\sout)?, " + r"(?:fielded by\s)?" + POS
+)
+
+STRIKEOUT_PHRASES = (
+    "swinging",
+    "on a foul tip",
+    "on a foul bunt",
+    "on a missed bunt",
+    "ejected",
+)
+
 Scoring = namedtuple("Scoring", "code result")
 
+# A rule scores an at-bat when its guard (if any) accepts it. The score
+# function returns a Scoring, or None when the description can't be parsed.
+Rule = namedtuple("Rule", "guard score")
+
+EVENT_RULES = {}
+PREFIX_RULES = []
+# Event types whose at-bats are scored as soon as they are created
+EAGER_EVENTS = set()
+_rules_by_event = {}
+
+
+def add_rule(event, score, guard=None, prefix=False, eager=False):
+    """Registers a rule for an event type, or for every event type starting
+    with event when prefix is set. Exact event types take precedence over
+    prefixes, prefixes are tried in the order they were first registered, and
+    the rules for one event are tried in the order they were added.
+
+    At-bats are scored on first access, after parsing and enhancing have
+    added their runners. A rule that must only see the runners the at-bat
+    was created with sets eager (exact event types only)."""
+    if eager:
+        if prefix:
+            raise ValueError("Only exact event types can be scored eagerly")
+        EAGER_EVENTS.add(event)
+    if prefix:
+        for rule_prefix, rules in PREFIX_RULES:
+            if rule_prefix == event:
+                break
+        else:
+            rules = []
+            PREFIX_RULES.append((event, rules))
+    else:
+        rules = EVENT_RULES.setdefault(event, [])
+    rules.append(Rule(guard, score))
+    _rules_by_event.clear()
+
+
+def get_rules(event):
+    try:
+        return _rules_by_event[event]
+    except KeyError:
+        pass
+    rules = EVENT_RULES.get(event)
+    if rules is None:
+        rules = next((r for prefix, r in PREFIX_RULES if event.startswith(prefix)), [])
+    _rules_by_event[event] = rules
+    return rules
+
+
+def is_eager(event):
+    return event in EAGER_EVENTS
+
+
+def normalize_description(des):
+    return DES_FIX_RE.sub(r", \1", des)
+
 
 def get_scoring(ab):
+    """Scores an at-bat from its event type and its description, which is
+    expected to have been through normalize_description already."""
     # hitData.location
-    ab.des = re.sub("\s,(\w)", r", \1", ab.des)  # 5/12  ' ,w' -> ', w'
-
-    if ab.event.startswith("strikeout") and (
-        "swinging" in ab.des
-        or "on a foul tip" in ab.des
-        or "on a foul bunt" in ab.des
-        or "on a missed bunt" in ab.des
-        or "ejected" in ab.des
-    ):
-        return Scoring("K", "out")
-
-    elif ab.event.startswith("strikeout") and "called out on" in ab.des:
-        return Scoring("Kl", "out")
-
-    elif ab.event == "walk":
-        return Scoring("W", "on-base")
-
-    elif ab.event == "intent_walk":
-        return Scoring("IW", "on-base")
-
-    elif ab.event == "catcher_interf":
-        g = re.search("reaches on catcher interference", ab.des)
-        if g:
-            return Scoring("CI", "error")
-
-    elif ab.event == "batter_interference":  # 4/1/2018, dp, weird
-        return Scoring("BI", "out")
-
-    elif ab.event == "grounded_into_double_play":
-        g = re.search("double play, " + POS, ab.des)
-        if g:
-            return Scoring("G" + POSITIONS[g.group(1)], "out")
-
-    elif ab.event == "force_out":
-        g = re.search(AIR + " into a force out, (?:fielded by\s)?" + POS, ab.des)
-        if g:
-            return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "fc")
-
-    elif ab.event == "sac_fly":
-        g = re.search("sacrifice fly(?:,| to) " + POS, ab.des)
-        if g:
-            return Scoring("F" + POSITIONS[g.group(1)], "out")
-        g = re.search("sacrifice fly.\s+Fielding error by (\w+ fielder)", ab.des)
-        if g:  # 4/25
-            return Scoring("E" + POSITIONS[g.group(1)], "error")
-
-    elif ab.event == "sac_fly_double_play" or ab.event == "sac_bunt_double_play":
-        g = re.search(
-            (AIR + " into a sacrifice double play" "(?: in foul territory)?, " + POS),
-            ab.des,
-        )
-        if g:
-            return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
-
-    elif ab.event == "sac_bunt":
-        g = re.search("sacrifice bunt(?:,|\sto) " + POS, ab.des)
-        if g:  # TODO: Sac bunt...G or P or F?
-            return Scoring("B" + POSITIONS[g.group(1)], "out")
-        if "hits a sacrifice bunt" in ab.des:
-            return Scoring("SAC", "out")
-
-    elif ab.event == "field_out":
-        # elif ab.event in ('Flyout', 'Lineout', 'Bunt Lineout', 'Pop Out',
-        #                  'Bunt Pop Out', 'Groundout', 'Bunt Groundout'):
-        # ', ' or ' sharply, ' or ' sharply to ' or ' to '
-        g = re.search(OUT + "(?:,\s|\s\w+,\s|\s\w+\sto\s|\sto\s|\son\s)" + POS, ab.des)
-        if g:
-            return Scoring(OUT_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
-        g = re.search(OUT, ab.des)
-        if g:
-            return Scoring(OUT_TYPES[g.group(1)], "out")
-
-    elif ab.event == "double_play" or ab.event == "triple_play":
-        g = re.search(
-            (
-                AIR
-                + " into a(?:n unassisted|\sfielder's choice)? "
-                + "(?:double|triple) play(?:\sin foul territory)?, "
-                + POS
-            ),
-            ab.des,
-        )
-        if g:
-            return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
-        # 9/10/2015 and 9/22/17 single on the play
-        g = re.search("Double play", ab.des)
-        if g:
-            return Scoring("DP", "out")
-
-    elif ab.event.startswith("pickoff_caught_stealing"):  # 2b, 3b, home
-        return Scoring("POCS", "fc")
-    elif ab.event.startswith("pickoff_error"):
-        return Scoring("PO", "error")
-    elif ab.event.startswith("pickoff"):
-        return Scoring("PO", "fc")
-    elif ab.event.startswith("caught_stealing"):
-        return Scoring("CS", "fc")
-    elif ab.event == "runner_double_play":
-        return Scoring("DP", "out")
+    for rule in get_rules(ab.event):
+        if rule.guard is None or rule.guard(ab):
+            scoring = rule.score(ab)
+            if scoring is None:
+                raise Exception("Parsing error: %s %r" % (ab.event, ab.des))
+            return scoring
 
-    elif ab.event == "double" and "ground-rule" in ab.des:
-        g = re.search(HIT, ab.des)
-        if g:
-            return Scoring(HIT_BALLS[g.group(1)], "on-base")
-
-    elif ab.event in ("single", "double", "triple"):
-        # 4/20/16 error on appeal play
-        g = re.search(HIT + " to " + POS, ab.des)
-        if g:
-            return Scoring(HIT_BALLS[g.group(1)] + POSITIONS[g.group(2)], "on-base")
-
-        g = re.search("singles on a (\w+\s)?(\w+ \w+)\.", ab.des)
-        if g:  # runner hit by ball 4/24/18 4/16,25/17
-            return Scoring("S", "on-base")
-
-        g = re.search("doubles\.", ab.des)
-        if g:  # 3/31/17
-            return Scoring("D", "on-base")
-
-        if ab.event == "single":
-            return Scoring("S", "on-base")
-        elif ab.event == "double":
-            return Scoring("D", "on-base")
-        elif ab.event == "triple":
-            return Scoring("T", "on-base")
-
-    elif ab.event == "home_run":
-        return Scoring("HR", "on-base")
-
-    elif ab.event == "hit_by_pitch":
-        return Scoring("HB", "on-base")
-
-    elif ab.event == "field_error":
-        g = re.search(ERROR_TYPES + " error by " + POS, ab.des)
-        if g:
-            return Scoring("E" + POSITIONS[g.group(1)], "error")
-
-    elif ab.event == "fielders_choice_out":
-        g = re.search(("(?:fielded by\s)?" + POS), ab.des)
-        if g and g.group(1) in POSITIONS.keys():
-            print(ab.__dict__)
-            return Scoring("FC" + POSITIONS[g.group(1)], "fc")
-        g = re.search(
-            ("reaches on a fielder's choice(?:\sout)?, " + "(?:fielded by\s)?" + POS),
-            ab.des,
-        )
-        if g:
-            return Scoring("FC" + POSITIONS[g.group(1)], "fc")
-
-    elif ab.event.startswith("fielders_choice"):
-        g = re.search(
-            ("reaches on a fielder's choice(?:\sout)?, " + "(?:fielded by\s)?" + POS),
-            ab.des,
-        )
-        if g:
-            return Scoring("FC" + POSITIONS[g.group(1)], "fc")
-        else:
-            return Scoring("FC", "fc")
-
-    elif ab.event == "fan_interference":
-        if ab.outs == 3 or ab.batter not in [r.id for r in ab.runners]:
-            return Scoring("FI", "out")
-        return Scoring("FI", "on-base")  # Nearly impossible to parse 4/18
-
-    elif ab.event == "wild_pitch":
-        return Scoring("WP", "on-base")
-    elif ab.event == "passed_ball":
-        return Scoring("PB", "on-base")
-    elif ab.event == "Strikeout Double Play":
-        return Scoring("K", "out")
-
-    elif ab.event.startswith("stolen_base"):
-        return Scoring("", "out")
-    elif ab.event == "runner_double_play":
+    raise Exception("New event type: %s %r" % (ab.event, ab.des))
+
+
+def constant(code, result):
+    scoring = Scoring(code, result)
+    return lambda ab: scoring
+
+
+def score_catcher_interference(ab):
+    if CATCHER_INTERF_RE.search(ab.des):
+        return Scoring("CI", "error")
+
+
+def score_grounded_into_double_play(ab):
+    g = GIDP_RE.search(ab.des)
+    if g:
+        return Scoring("G" + POSITIONS[g.group(1)], "out")
+
+
+def score_force_out(ab):
+    g = FORCE_OUT_RE.search(ab.des)
+    if g:
+        return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "fc")
+
+
+def score_sac_fly(ab):
+    g = SAC_FLY_RE.search(ab.des)
+    if g:
+        return Scoring("F" + POSITIONS[g.group(1)], "out")
+    g = SAC_FLY_ERROR_RE.search(ab.des)
+    if g:  # 4/25
+        return Scoring("E" + POSITIONS[g.group(1)], "error")
+
+
+def score_sac_double_play(ab):
+    g = SAC_DP_RE.search(ab.des)
+    if g:
+        return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
+
+
+def score_sac_bunt(ab):
+    g = SAC_BUNT_RE.search(ab.des)
+    if g:  # TODO: Sac bunt...G or P or F?
+        return Scoring("B" + POSITIONS[g.group(1)], "out")
+    if "hits a sacrifice bunt" in ab.des:
+        return Scoring("SAC", "out")
+
+
+def score_field_out(ab):
+    # elif ab.event in ('Flyout', 'Lineout', 'Bunt Lineout', 'Pop Out',
+    #                  'Bunt Pop Out', 'Groundout', 'Bunt Groundout'):
+    g = FIELD_OUT_RE.search(ab.des)
+    if g:
+        return Scoring(OUT_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
+    g = OUT_RE.search(ab.des)
+    if g:
+        return Scoring(OUT_TYPES[g.group(1)], "out")
+
+
+def score_double_play(ab):
+    g = DP_RE.search(ab.des)
+    if g:
+        return Scoring(AIR_TYPES[g.group(1)] + POSITIONS[g.group(2)], "out")
+    # 9/10/2015 and 9/22/17 single on the play
+    if DOUBLE_PLAY_RE.search(ab.des):
         return Scoring("DP", "out")
-    elif ab.event == "other_out":
-        return Scoring("", "out")
-    elif ab.event == "other_advance":
-        return Scoring("", "on-base")
-
-    elif ab.event == "defensive_switch":
-        return Scoring("DS", "on-base")
-    elif ab.event == "balk":
-        return Scoring("BK", "on-base")
-
-    elif ab.event in [
-        "game_advisory",
-        "pitching_substitution",
-        "offensive_substitution",
-        "defensive_substitution",
-        "runner_placed",
-        "mound_visit",
-    ]:
-        return Scoring("", "blank")
 
-    else:
-        print(ab.__dict__)
-        raise Exception("New event type: %s" % ab.event)
 
-    print(ab.__dict__)
-    raise Exception("Parsing error")
+def score_ground_rule_double(ab):
+    g = HIT_RE.search(ab.des)
+    if g:
+        return Scoring(HIT_BALLS[g.group(1)], "on-base")
+
+
+HIT_CODES = {"single": "S", "double": "D", "triple": "T"}
+
+
+def score_hit(ab):
+    # 4/20/16 error on appeal play
+    g = HIT_TO_RE.search(ab.des)
+    if g:
+        return Scoring(HIT_BALLS[g.group(1)] + POSITIONS[g.group(2)], "on-base")
+
+    if SINGLES_ON_RE.search(ab.des):  # runner hit by ball 4/24/18 4/16,25/17
+        return Scoring("S", "on-base")
+
+    if DOUBLES_RE.search(ab.des):  # 3/31/17
+        return Scoring("D", "on-base")
+
+    return Scoring(HIT_CODES[ab.event], "on-base")
+
+
+def score_field_error(ab):
+    g = FIELD_ERROR_RE.search(ab.des)
+    if g:
+        return Scoring("E" + POSITIONS[g.group(1)], "error")
+
+
+def score_fielders_choice_out(ab):
+    g = FIELDED_BY_RE.search(ab.des)
+    if g and g.group(1) in POSITIONS:
+        return Scoring("FC" + POSITIONS[g.group(1)], "fc")
+    g = FIELDERS_CHOICE_RE.search(ab.des)
+    if g:
+        return Scoring("FC" + POSITIONS[g.group(1)], "fc")
+
+
+def score_fielders_choice(ab):
+    g = FIELDERS_CHOICE_RE.search(ab.des)
+    if g:
+        return Scoring("FC" + POSITIONS[g.group(1)], "fc")
+    return Scoring("FC", "fc")
+
+
+def score_fan_interference(ab):
+    # Registered as eager, so runners are only the ones the AtBat was created
+    # with. The parser creates at-bats without any, so games from feeds have
+    # always scored FI out.
+    if ab.outs == 3 or ab.batter not in [r.id for r in ab.runners]:
+        return Scoring("FI", "out")
+    return Scoring("FI", "on-base")  # Nearly impossible to parse 4/18
+
+
+add_rule(
+    "strikeout",
+    constant("K", "out"),
+    lambda ab: any(phrase in ab.des for phrase in STRIKEOUT_PHRASES),
+    prefix=True,
+)
+add_rule(
+    "strikeout",
+    constant("Kl", "out"),
+    lambda ab: "called out on" in ab.des,
+    prefix=True,
+)
+add_rule("walk", constant("W", "on-base"))
+add_rule("intent_walk", constant("IW", "on-base"))
+add_rule("catcher_interf", score_catcher_interference)
+add_rule("batter_interference", constant("BI", "out"))  # 4/1/2018, dp, weird
+add_rule("grounded_into_double_play", score_grounded_into_double_play)
+add_rule("force_out", score_force_out)
+add_rule("sac_fly", score_sac_fly)
+add_rule("sac_fly_double_play", score_sac_double_play)
+add_rule("sac_bunt_double_play", score_sac_double_play)
+add_rule("sac_bunt", score_sac_bunt)
+add_rule("field_out", score_field_out)
+add_rule("double_play", score_double_play)
+add_rule("triple_play", score_double_play)
+add_rule("pickoff_caught_stealing", constant("POCS", "fc"), prefix=True)
+add_rule("pickoff_error", constant("PO", "error"), prefix=True)
+add_rule("pickoff", constant("PO", "fc"), prefix=True)
+add_rule("caught_stealing", constant("CS", "fc"), prefix=True)
+add_rule("runner_double_play", constant("DP", "out"))
+add_rule("double", score_ground_rule_double, lambda ab: "ground-rule" in ab.des)
+add_rule("single", score_hit)
+add_rule("double", score_hit)
+add_rule("triple", score_hit)
+add_rule("home_run", constant("HR", "on-base"))
+add_rule("hit_by_pitch", constant("HB", "on-base"))
+add_rule("field_error", score_field_error)
+add_rule("fielders_choice_out", score_fielders_choice_out)
+add_rule("fielders_choice", score_fielders_choice, prefix=True)
+add_rule("fan_interference", score_fan_interference, eager=True)
+add_rule("wild_pitch", constant("WP", "on-base"))
+add_rule("passed_ball", constant("PB", "on-base"))
+add_rule("Strikeout Double Play", constant("K", "out"))
+add_rule("stolen_base", constant("", "out"), prefix=True)
+add_rule("other_out", constant("", "out"))
+add_rule("other_advance", constant("", "on-base"))
+add_rule("defensive_switch", constant("DS", "on-base"))
+add_rule("balk", constant("BK", "on-base"))
+for event in (
+    "game_advisory",
+    "pitching_substitution",
+    "offensive_substitution",
+    "defensive_substitution",
+    "runner_placed",
+    "mound_visit",
+):
+    add_rule(event, constant("", "blank"))
@@ -0,0 +1,219 @@
+"""Many archived games in one file, for serving.
+
+A season archive holds the game_archive form of each game one after
+another, followed by an index of where each one is, with its date and
+teams. SeasonArchive maps the file into memory: opening it only reads the
+index, loading a game only unpacks that game's bytes, and processes that
+open the same file share its pages.
+
+The layout, all little-endian:
+
+    header   magic, format version (H), game count (I), index offset (Q)
+    games    each game's game_archive bytes
+    index    per game, by gamePk: gamePk (q), offset (Q), length (I),
+             date as a day ordinal (I, 0 if unknown), away, home (8s)
+"""
+
+from datetime import date
+import mmap
+import os
+import struct
+import tempfile
+
+from . import game_archive
+from .feed_source import to_date
+
+MAGIC = b"GD2S"
+FORMAT_VERSION = 1
+SUFFIX = ".gd2s"
+
+HEADER = struct.Struct("<4sHIQ")
+INDEX_ENTRY = struct.Struct("<qQII8s8s")
+
+
+class IndexEntry:
+    __slots__ = ("game_pk", "offset", "length", "date", "away", "home")
+
+    def __init__(self, game_pk, offset, length, date, away, home):
+        self.game_pk = game_pk
+        self.offset = offset
+        self.length = length
+        self.date = date
+        self.away = away
+        self.home = home
+
+    def pack(self):
+        return INDEX_ENTRY.pack(
+            self.game_pk,
+            self.offset,
+            self.length,
+            self.date.toordinal() if self.date else 0,
+            (self.away or "").encode("utf-8"),
+            (self.home or "").encode("utf-8"),
+        )
+
+    @classmethod
+    def unpack_from(cls, data, offset):
+        game_pk, game_offset, length, ordinal, away, home = INDEX_ENTRY.unpack_from(
+            data, offset
+        )
+        return cls(
+            game_pk,
+            game_offset,
+            length,
+            date.fromordinal(ordinal) if ordinal else None,
+            away.rstrip(b"\0").decode("utf-8") or None,
+            home.rstrip(b"\0").decode("utf-8") or None,
+        )
+
+
+class SeasonArchiveWriter:
+    """Writes a season archive to path, game by game. Nothing is at path
+    until close(), so readers never see half an archive.
+
+        with SeasonArchiveWriter("2018.gd2s") as writer:
+            for game in games:
+                writer.add(game)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        directory = os.path.dirname(path) or "."
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+        self.file.write(b"\0" * HEADER.size)
+
+    def add(self, game, data=None):
+        """Adds a game, a later one replacing an earlier one with the same
+        gamePk. data is the game's game_archive bytes, if already at hand."""
+        if data is None:
+            data = game_archive.dumps(game)
+        self.entries[game.game_pk] = IndexEntry(
+            game.game_pk,
+            self.file.tell(),
+            len(data),
+            game.date and to_date(game.date),
+            game.away,
+            game.home,
+        )
+        self.file.write(data)
+
+    def close(self):
+        index_offset = self.file.tell()
+        for game_pk in sorted(self.entries):
+            self.file.write(self.entries[game_pk].pack())
+        self.file.seek(0)
+        self.file.write(
+            HEADER.pack(MAGIC, FORMAT_VERSION, len(self.entries), index_offset)
+        )
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def pack_directory(directory, path):
+    """Writes the game archives in directory as one season archive at path
+    and returns the number of games."""
+    with SeasonArchiveWriter(path) as writer:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(game_archive.SUFFIX):
+                with open(os.path.join(directory, name), "rb") as f:
+                    data = f.read()
+                writer.add(game_archive.loads(data), data)
+    return len(writer.entries)
+
+
+class SeasonArchive:
+    """Reads games from a season archive by gamePk, and finds them by date
+    or team. The file is opened again after being sent to a worker
+    process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mmap = None
+        self.entries = {}
+        self.by_date = {}
+        self.by_team = {}
+        data = self.data
+        magic, version, game_count, index_offset = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a season archive")
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported season archive version %d" % version)
+        for i in range(game_count):
+            entry = IndexEntry.unpack_from(data, index_offset + i * INDEX_ENTRY.size)
+            self.entries[entry.game_pk] = entry
+            self.by_date.setdefault(entry.date, []).append(entry.game_pk)
+            for team in (entry.away, entry.home):
+                self.by_team.setdefault(team, []).append(entry.game_pk)
+
+    @property
+    def data(self):
+        if self._mmap is None:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def __getstate__(self):
+        # Maps can't be sent to worker processes
+        state = self.__dict__.copy()
+        state["_mmap"] = None
+        return state
+
+    def __contains__(self, game_pk):
+        return game_pk in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def game_ids(self):
+        return list(self.entries)
+
+    def load(self, game_pk, player_registry=None):
+        """Returns the archived Game. Raises KeyError if it isn't there."""
+        entry = self.entries[game_pk]
+        view = memoryview(self.data)[entry.offset : entry.offset + entry.length]
+        try:
+            return game_archive.loads(view, player_registry)
+        finally:
+            view.release()
+
+    def games_on(self, day):
+        """Returns the gamePks of the games on a date (or YYYY-MM-DD)."""
+        return list(self.by_date.get(to_date(day), ()))
+
+    def games_between(self, start_date, end_date):
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        return [
+            game_pk
+            for game_pk, entry in self.entries.items()
+            if entry.date and start_date <= entry.date <= end_date
+        ]
+
+    def games_for(self, team):
+        """Returns the gamePks of the games a team (by fileCode) played."""
+        return list(self.by_team.get(team, ()))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
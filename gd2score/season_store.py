@@ -0,0 +1,182 @@
+import numpy as np
+
+# One row per at-bat. half is 0 for the top of the inning and 1 for the
+# bottom. event, code and result index into the store's vocabularies, and
+# runner_start/runner_count give the at-bat's rows in the runner table.
+ATBAT_DTYPE = np.dtype(
+    [
+        ("game_pk", "i8"),
+        ("inning", "i2"),
+        ("half", "i1"),
+        ("pa_num", "i2"),
+        ("batter", "i4"),
+        ("pitcher", "i4"),
+        ("outs", "i1"),
+        ("away_score", "i2"),
+        ("home_score", "i2"),
+        ("event", "i2"),
+        ("code", "i2"),
+        ("result", "i1"),
+        ("runner_start", "i4"),
+        ("runner_count", "i2"),
+    ]
+)
+
+# One row per runner, mid-PA runners first within each at-bat. atbat is the
+# row index of the runner's at-bat.
+RUNNER_DTYPE = np.dtype(
+    [
+        ("atbat", "i4"),
+        ("id", "i4"),
+        ("start", "i1"),
+        ("end", "i1"),
+        ("out", "?"),
+        ("to_score", "?"),
+        ("mid_pa", "?"),
+        ("event_num", "i2"),
+    ]
+)
+
+
+class Vocabulary:
+    """Assigns consecutive integers to strings in the order they are first
+    seen."""
+
+    def __init__(self, words=()):
+        self.words = list(words)
+        self.ids = {word: i for i, word in enumerate(self.words)}
+
+    def add(self, word):
+        try:
+            return self.ids[word]
+        except KeyError:
+            self.ids[word] = len(self.words)
+            self.words.append(word)
+            return self.ids[word]
+
+    def get(self, word):
+        """Returns the id of word, or -1 (which matches no row) if it was
+        never seen."""
+        return self.ids.get(word, -1)
+
+
+class SeasonStore:
+    """Parsed at-bats and runners from many games as NumPy structured arrays,
+    so season-wide questions become vectorized queries. For example, every
+    runner who went first to third on a single:
+
+        runners = store.query_runners(event="single", start=1, end=3, out=False)
+    """
+
+    def __init__(self, atbats, runners, events, codes, results):
+        self.atbats = atbats
+        self.runners = runners
+        self.events = events
+        self.codes = codes
+        self.results = results
+
+    @classmethod
+    def from_games(cls, games):
+        events, codes, results = Vocabulary(), Vocabulary(), Vocabulary()
+        atbat_rows = []
+        runner_rows = []
+        for game in games:
+            for inning in game:
+                for half_inning in inning:
+                    half = 1 if half_inning.num % 1.0 else 0
+                    for atbat in half_inning:
+                        row = len(atbat_rows)
+                        runner_start = len(runner_rows)
+                        for runner in atbat.mid_pa_runners:
+                            runner_rows.append(cls.runner_row(row, runner, True))
+                        for runner in atbat.runners:
+                            runner_rows.append(cls.runner_row(row, runner, False))
+                        atbat_rows.append(
+                            (
+                                game.game_pk,
+                                inning.num,
+                                half,
+                                atbat.pa_num,
+                                atbat.batter,
+                                atbat.pitcher,
+                                atbat.outs,
+                                atbat.away_score,
+                                atbat.home_score,
+                                events.add(atbat.event),
+                                codes.add(atbat.scoring.code),
+                                results.add(atbat.scoring.result),
+                                runner_start,
+                                len(runner_rows) - runner_start,
+                            )
+                        )
+        return cls(
+            np.array(atbat_rows, dtype=ATBAT_DTYPE),
+            np.array(runner_rows, dtype=RUNNER_DTYPE),
+            events,
+            codes,
+            results,
+        )
+
+    @staticmethod
+    def runner_row(atbat_row, runner, mid_pa):
+        return (
+            atbat_row,
+            runner.id,
+            runner.start,
+            runner.end,
+            runner.out,
+            runner.to_score,
+            mid_pa,
+            runner.event_num,
+        )
+
+    def save(self, path):
+        np.savez(
+            path,
+            atbats=self.atbats,
+            runners=self.runners,
+            events=np.array(self.events.words, dtype=str),
+            codes=np.array(self.codes.words, dtype=str),
+            results=np.array(self.results.words, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["atbats"],
+                data["runners"],
+                Vocabulary(data["events"].tolist()),
+                Vocabulary(data["codes"].tolist()),
+                Vocabulary(data["results"].tolist()),
+            )
+
+    def query_atbats(self, event=None, code=None, result=None, **fields):
+        """Returns the at-bat rows matching every condition given. event,
+        code and result are compared by name; any other keyword is compared
+        against the at-bat column of the same name."""
+        return self.atbats[self.atbat_mask(self.atbats, event, code, result, fields)]
+
+    def query_runners(self, event=None, code=None, result=None, **fields):
+        """Returns the runner rows matching every condition given. event,
+        code and result refer to the runner's at-bat; any other keyword is
+        compared against the runner column of the same name."""
+        mask = np.ones(len(self.runners), dtype=bool)
+        if event is not None or code is not None or result is not None:
+            atbats = self.atbats[self.runners["atbat"]]
+            mask &= self.atbat_mask(atbats, event, code, result, {})
+        for name, value in fields.items():
+            mask &= self.runners[name] == value
+        return self.runners[mask]
+
+    def atbat_mask(self, atbats, event, code, result, fields):
+        mask = np.ones(len(atbats), dtype=bool)
+        if event is not None:
+            mask &= atbats["event"] == self.events.get(event)
+        if code is not None:
+            mask &= atbats["code"] == self.codes.get(code)
+        if result is not None:
+            mask &= atbats["result"] == self.results.get(result)
+        for name, value in fields.items():
+            mask &= atbats[name] == value
+        return mask
@@ -0,0 +1,500 @@
+"""A small SVG element tree that serializes exactly like svgwrite.
+
+svgwrite checks every attribute as it is set and builds an ElementTree
+before writing it out, which makes it the slowest part of rendering a
+scorecard. These classes implement the part of svgwrite's API that
+DrawScorecard and DrawRunners use (element constructors, attribute access,
+transforms, set_desc and the Drawing factory methods) and write the markup
+directly, with the same attribute order, number formatting and escaping.
+
+Validation is opt-in: a Drawing created with debug=True runs every element
+through svgwrite's validator when it is serialized.
+
+A compact Drawing writes smaller markup instead: numbers are rounded to a
+given number of decimals, empty tags and the root element lose everything
+that isn't needed, and there is no XML declaration.
+"""
+
+from time import perf_counter
+
+from svgwrite.validator2 import get_validator
+
+from .metrics import record, timed
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8" ?>\n'
+
+
+def get_number_formatter(precision):
+    """Returns a function writing numbers rounded to precision decimals,
+    without trailing zeros."""
+
+    def format_number(value):
+        if isinstance(value, int):
+            return str(value)
+        text = "%.*f" % (precision, value)
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+
+    return format_number
+
+
+class Format:
+    """How markup is written. The default matches svgwrite exactly."""
+
+    def __init__(self, compact=False, precision=2):
+        self.compact = compact
+        self.number = get_number_formatter(precision) if compact else str
+        self.empty_tag_end = "/>" if compact else " />"
+
+
+SVGWRITE_FORMAT = Format()
+
+
+class NumberList:
+    """Attribute value made of numbers, joined the way svgwrite.utils.strlist
+    does (flattening nested sequences and skipping None) when written."""
+
+    __slots__ = ("values", "separator")
+
+    def __init__(self, values, separator=","):
+        self.values = []
+        for value in values:
+            if isinstance(value, (list, tuple)):
+                self.values.extend(v for v in value if v is not None)
+            elif value is not None:
+                self.values.append(value)
+        self.separator = separator
+
+    def to_string(self, number):
+        return self.separator.join(
+            number(v) if isinstance(v, (int, float)) else str(v) for v in self.values
+        )
+
+
+class Transform:
+    """Value of a transform attribute: a list of (name, NumberList)."""
+
+    __slots__ = ("operations",)
+
+    def __init__(self):
+        self.operations = []
+
+    def to_string(self, number):
+        return " ".join(
+            "%s(%s)" % (name, values.to_string(number))
+            for name, values in self.operations
+        )
+
+
+def escape_attrib(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def escape_cdata(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+class Element:
+    __slots__ = ("attribs", "elements")
+    elementname = None
+
+    def __init__(self, **extra):
+        self.attribs = {}
+        self.elements = []
+        self.update(extra)
+
+    def update(self, attribs):
+        for key, value in attribs.items():
+            self.attribs[key.rstrip("_").replace("_", "-")] = value
+
+    def __getitem__(self, key):
+        return self.attribs[key]
+
+    def __setitem__(self, key, value):
+        self.attribs[key] = value
+
+    def add(self, element):
+        self.elements.append(element)
+        return element
+
+    def set_desc(self, title=None, desc=None):
+        if desc is not None:
+            self.elements.insert(0, Desc(desc))
+        if title is not None:
+            self.elements.insert(0, Title(title))
+
+    def translate(self, tx, ty=None):
+        self.add_transformation("translate", [tx, ty])
+
+    def rotate(self, angle, center=None):
+        self.add_transformation("rotate", [angle, center])
+
+    def scale(self, sx, sy=None):
+        self.add_transformation("scale", [sx, sy])
+
+    def add_transformation(self, name, values):
+        transform = self.attribs.get("transform")
+        if transform is None:
+            transform = self.attribs["transform"] = Transform()
+        transform.operations.append((name, NumberList(values)))
+
+    def get_text(self):
+        return None
+
+    def tostring(self, fmt=SVGWRITE_FORMAT):
+        out = []
+        self.write_xml(out, fmt)
+        return "".join(out)
+
+    def write_xml(self, out, fmt=SVGWRITE_FORMAT):
+        """Appends the markup of the element and its subelements to out."""
+        self.write_start_tag(out, fmt)
+        text = self.get_text()
+        if text or self.elements:
+            out.append(">")
+            if text:
+                out.append(escape_cdata(text))
+            for element in self.elements:
+                element.write_xml(out, fmt)
+            out.append("</%s>" % self.elementname)
+        else:
+            out.append(fmt.empty_tag_end)
+
+    def write_start_tag(self, out, fmt):
+        """Appends the element's tag and attributes, without the closing
+        bracket."""
+        out.append("<" + self.elementname)
+        for name, value in sorted(self.attribs.items()):
+            if value is None:
+                continue
+            if isinstance(value, (int, float)):
+                value = fmt.number(value)
+            elif isinstance(value, (NumberList, Transform)):
+                value = value.to_string(fmt.number)
+            else:
+                value = str(value)
+            if value:
+                out.append(' %s="%s"' % (name, escape_attrib(value)))
+
+    def validate(self, validator):
+        attribs = {}
+        for name, value in self.attribs.items():
+            if value is None:
+                continue
+            if isinstance(value, (int, float)):
+                validator.check_svg_type(value, "number")
+            elif isinstance(value, (NumberList, Transform)):
+                value = value.to_string(str)
+            attribs[name] = value
+        validator.check_all_svg_attribute_values(self.elementname, attribs)
+        for element in self.elements:
+            if isinstance(element, Element):
+                validator.check_valid_children(self.elementname, element.elementname)
+            element.validate(validator)
+
+
+class Title:
+    __slots__ = ("text",)
+    elementname = "title"
+
+    def __init__(self, text):
+        self.text = str(text)
+
+    def write_xml(self, out, fmt=SVGWRITE_FORMAT):
+        if self.text:
+            out.append(
+                "<%s>%s</%s>"
+                % (self.elementname, escape_cdata(self.text), self.elementname)
+            )
+        else:
+            out.append("<" + self.elementname + fmt.empty_tag_end)
+
+    def validate(self, validator):
+        pass
+
+
+class Desc(Title):
+    __slots__ = ()
+    elementname = "desc"
+
+
+class Group(Element):
+    __slots__ = ()
+    elementname = "g"
+
+
+class Defs(Group):
+    __slots__ = ()
+    elementname = "defs"
+
+    def write_xml(self, out, fmt=SVGWRITE_FORMAT):
+        if self.elements or not fmt.compact:
+            Group.write_xml(self, out, fmt)
+
+
+class Line(Element):
+    __slots__ = ()
+    elementname = "line"
+
+    def __init__(self, start=(0, 0), end=(0, 0), **extra):
+        Element.__init__(self, **extra)
+        self.attribs["x1"], self.attribs["y1"] = start
+        self.attribs["x2"], self.attribs["y2"] = end
+
+
+class Rect(Element):
+    __slots__ = ()
+    elementname = "rect"
+
+    def __init__(self, insert=(0, 0), size=(1, 1), rx=None, ry=None, **extra):
+        Element.__init__(self, **extra)
+        self.attribs["x"], self.attribs["y"] = insert
+        self.attribs["width"], self.attribs["height"] = size
+        if rx is not None:
+            self.attribs["rx"] = rx
+        if ry is not None:
+            self.attribs["ry"] = ry
+
+
+class Circle(Element):
+    __slots__ = ()
+    elementname = "circle"
+
+    def __init__(self, center=(0, 0), r=1, **extra):
+        Element.__init__(self, **extra)
+        self.attribs["cx"], self.attribs["cy"] = center
+        self.attribs["r"] = r
+
+
+class Text(Element):
+    __slots__ = ("text",)
+    elementname = "text"
+
+    def __init__(self, text, insert=None, x=None, y=None, **extra):
+        Element.__init__(self, **extra)
+        self.text = text
+        if insert is not None:
+            x, y = [insert[0]], [insert[1]]
+        if x is not None:
+            self.attribs["x"] = NumberList(x, " ")
+        if y is not None:
+            self.attribs["y"] = NumberList(y, " ")
+
+    def get_text(self):
+        return str(self.text)
+
+
+class Image(Element):
+    __slots__ = ()
+    elementname = "image"
+
+    def __init__(self, href, insert=None, size=None, **extra):
+        Element.__init__(self, **extra)
+        self.attribs["xlink:href"] = href
+        if insert is not None:
+            self.attribs["x"], self.attribs["y"] = insert
+        if size is not None:
+            self.attribs["width"], self.attribs["height"] = size
+
+
+class Use(Element):
+    __slots__ = ()
+    elementname = "use"
+
+    def __init__(self, href, insert=None, size=None, **extra):
+        Element.__init__(self, **extra)
+        self.attribs["xlink:href"] = href
+        if insert is not None:
+            self.attribs["x"], self.attribs["y"] = insert
+        if size is not None:
+            self.attribs["width"], self.attribs["height"] = size
+
+
+class Symbol(Element):
+    __slots__ = ()
+    elementname = "symbol"
+
+
+class Raw:
+    """Markup that is written out as is."""
+
+    __slots__ = ("markup",)
+
+    def __init__(self, markup):
+        self.markup = markup
+
+    def write_xml(self, out, fmt=SVGWRITE_FORMAT):
+        out.append(self.markup)
+
+    def validate(self, validator):
+        pass
+
+
+class Drawing(Element):
+    """Root svg element. Like svgwrite.Drawing, it doubles as a factory for
+    the elements that go in it, counting them in element_count. compact and
+    precision choose the Format it is written in."""
+
+    __slots__ = ("debug", "profile", "defs", "format", "element_count")
+    elementname = "svg"
+
+    def __init__(
+        self,
+        size=("100%", "100%"),
+        debug=False,
+        profile="full",
+        compact=False,
+        precision=2,
+        **extra,
+    ):
+        Element.__init__(self, **extra)
+        self.debug = debug
+        self.profile = profile
+        self.format = Format(compact, precision)
+        self.element_count = 0
+        self.attribs["width"], self.attribs["height"] = size
+        self.defs = self.add(Defs())
+
+    @property
+    def compact(self):
+        return self.format.compact
+
+    def g(self, **extra):
+        self.element_count += 1
+        return Group(**extra)
+
+    def line(self, start=(0, 0), end=(0, 0), **extra):
+        self.element_count += 1
+        return Line(start, end, **extra)
+
+    def rect(self, insert=(0, 0), size=(1, 1), rx=None, ry=None, **extra):
+        self.element_count += 1
+        return Rect(insert, size, rx, ry, **extra)
+
+    def circle(self, center=(0, 0), r=1, **extra):
+        self.element_count += 1
+        return Circle(center, r, **extra)
+
+    def text(self, text, insert=None, x=None, y=None, **extra):
+        self.element_count += 1
+        return Text(text, insert, x, y, **extra)
+
+    def image(self, href, insert=None, size=None, **extra):
+        self.element_count += 1
+        return Image(href, insert, size, **extra)
+
+    def use(self, href, insert=None, size=None, **extra):
+        self.element_count += 1
+        return Use(href, insert, size, **extra)
+
+    def symbol(self, **extra):
+        self.element_count += 1
+        return Symbol(**extra)
+
+    def set_root_attribs(self):
+        self.attribs["xmlns"] = "http://www.w3.org/2000/svg"
+        self.attribs["xmlns:xlink"] = "http://www.w3.org/1999/xlink"
+        if self.compact:
+            # 100% is the default size, and the rest is informational
+            if self.attribs["width"] == self.attribs["height"] == "100%":
+                self.attribs["width"] = self.attribs["height"] = None
+            return
+        self.attribs["xmlns:ev"] = "http://www.w3.org/2001/xml-events"
+        self.attribs["baseProfile"] = self.profile
+        self.attribs["version"] = "1.1"
+
+    def tostring(self, fmt=None):
+        return Element.tostring(self, fmt or self.format)
+
+    def write_xml(self, out, fmt=None):
+        self.set_root_attribs()
+        if self.debug:
+            self.validate(get_validator(self.profile, self.debug))
+        Element.write_xml(self, out, fmt or self.format)
+
+    def write(self, fileobj):
+        with timed("serialize"):
+            if not self.compact:
+                fileobj.write(XML_DECLARATION)
+            fileobj.write(self.tostring())
+
+
+class StreamingDrawing(Drawing):
+    """A Drawing that writes each element to fileobj as soon as it is added
+    instead of keeping it, so only the element being built is in memory.
+    Elements must be complete when they are added, and close() must be
+    called at the end. fileobj is written strings, like Drawing.write.
+
+    defs is written just before the first element, so it can be filled in
+    until then."""
+
+    __slots__ = ("fileobj", "validator")
+
+    def __init__(
+        self,
+        fileobj,
+        size=("100%", "100%"),
+        debug=False,
+        profile="full",
+        compact=False,
+        precision=2,
+    ):
+        self.fileobj = fileobj
+        self.validator = get_validator(profile, debug) if debug else None
+        Element.__init__(self)
+        self.debug = debug
+        self.profile = profile
+        self.format = Format(compact, precision)
+        self.element_count = 0
+        self.attribs["width"], self.attribs["height"] = size
+        self.set_root_attribs()
+        if self.validator:
+            Element.validate(self, self.validator)
+
+        out = [] if compact else [XML_DECLARATION]
+        self.write_start_tag(out, self.format)
+        out.append(">")
+        fileobj.write("".join(out))
+        self.defs = Defs()
+
+    def add(self, element):
+        self.write_defs()
+        if self.validator:
+            self.validator.check_valid_children(self.elementname, element.elementname)
+            element.validate(self.validator)
+        start = perf_counter()
+        out = []
+        element.write_xml(out, self.format)
+        self.fileobj.write("".join(out))
+        record("serialize", perf_counter() - start)
+        return element
+
+    def write_defs(self):
+        if self.defs is not None:
+            defs, self.defs = self.defs, None
+            self.add(defs)
+
+    def close(self):
+        self.write_defs()
+        self.fileobj.write("</%s>" % self.elementname)
@@ -17,7 +17,13 @@ setuptools.setup(
     url="https://github.com/brewerja/gd2score",
     keywords="baseball mlb",
     packages=setuptools.find_packages(exclude=["tests"]),
-    install_requires=["svgwrite"],
+    install_requires=["svgwrite", "mlb-statsapi"],
+    extras_require={
+        "async": ["aiohttp"],
+        "columnar": ["numpy"],
+        "fast": ["orjson", "ijson"],
+    },
+    entry_points={"console_scripts": ["gd2score=gd2score.__main__:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU General Public License v3.0"
@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+from gd2score.build_game import GameBuilder
+from gd2score.feed_source import MemorySource
+from gd2score.player_registry import PlayerRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+FIXTURE_NAMES = sorted(
+    name[: -len(".json")] for name in os.listdir(FIXTURE_DIR) if name.endswith(".json")
+)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def load_feed(name):
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_game(feed):
+    builder = GameBuilder(MemorySource({}), player_registry=PlayerRegistry())
+    return builder.build_from_feed(feed)
+
+
+def iter_atbats(game):
+    for inning in game:
+        for half_inning in inning:
+            yield from half_inning
+
+
+@pytest.fixture(params=FIXTURE_NAMES)
+def fixture_name(request):
+    return request.param
+
+
+@pytest.fixture
+def feed(fixture_name):
+    return load_feed(fixture_name)
+
+
+@pytest.fixture
+def game(feed):
+    return build_game(feed)
+
+
+@pytest.fixture
+def feeds():
+    """Every fixture feed, by gamePk."""
+    feeds = (load_feed(name) for name in FIXTURE_NAMES)
+    return {feed["gamePk"]: feed for feed in feeds}
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+import svgwrite
+
+from gd2score import svg
+from gd2score.draw_scorecard import DrawScorecard
+from gd2score.live import LiveScorecard
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_fast_backend_matches_svgwrite(game, debug):
+    fast = DrawScorecard(backend="fast", debug=debug).draw(game)
+    reference = DrawScorecard(backend="svgwrite", debug=debug).draw(game)
+    assert fast.tostring() == reference.tostring()
+
+
+def draw_elements(dwg):
+    group = dwg.g(class_="inning")
+    group.add(dwg.line((0.5, 1e-05), (10, 1 / 3), stroke_width=2))
+    group.add(dwg.rect((1, 2), (3.25, 4), fill="none"))
+    group.add(dwg.circle((5, 5), 1.5))
+    text = dwg.text('A & B <"C">', x=[1, 2], y=[3])
+    text.rotate(-45, center=(1, 3))
+    group.add(text)
+    dwg.add(group)
+    dwg.add(dwg.image("https://example.com/logo.svg?a=1&b=2", (0, 0), (40, 40)))
+    return dwg
+
+
+def test_fast_elements_match_svgwrite():
+    fast = draw_elements(svg.Drawing(profile="full"))
+    reference = draw_elements(svgwrite.Drawing(profile="full"))
+    assert fast.tostring() == reference.tostring()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"compact": True}, {"compact": True, "precision": 0}, {"debug": True}],
+)
+def test_draw_to_matches_draw(game, options):
+    drawn = io.StringIO()
+    DrawScorecard(**options).draw(game).write(drawn)
+    streamed = io.StringIO()
+    DrawScorecard(**options).draw_to(game, streamed)
+    assert streamed.getvalue() == drawn.getvalue()
+
+
+def test_live_draw_to_matches_draw(game):
+    drawn = io.StringIO()
+    DrawScorecard().draw(game).write(drawn)
+    streamed = io.StringIO()
+    LiveScorecard().draw_to(game, streamed)
+    assert streamed.getvalue() == drawn.getvalue()
+
+
+def test_empty_streaming_drawing_matches_drawing():
+    drawn = io.StringIO()
+    svg.Drawing().write(drawn)
+    streamed = io.StringIO()
+    svg.StreamingDrawing(streamed).close()
+    assert streamed.getvalue() == drawn.getvalue()
@@ -0,0 +1,72 @@
+import gzip
+import io
+import shutil
+
+import pytest
+
+from gd2score import feed_reader
+from gd2score.feed_cache import FeedCache
+from gd2score.feed_reader import read_feed, slim_feed
+from gd2score.feed_source import DirectorySource
+
+from conftest import FIXTURE_DIR, build_game, iter_atbats, load_feed
+
+
+def read(feed_bytes, **kwargs):
+    return read_feed(io.BytesIO(feed_bytes), **kwargs)
+
+
+@pytest.fixture
+def feed_bytes(fixture_name):
+    with open(f"{FIXTURE_DIR}/{fixture_name}.json", "rb") as f:
+        return f.read()
+
+
+def describe(game):
+    return [
+        (atbat.pa_num, atbat.batter, atbat.des, atbat.scoring, str(atbat.runners))
+        for atbat in iter_atbats(game)
+    ]
+
+
+def test_selective_read(feed, feed_bytes):
+    assert read(feed_bytes, selective=True) == slim_feed(feed)
+
+
+def test_stream_read(feed, feed_bytes):
+    assert read(feed_bytes, stream=True) == slim_feed(feed)
+
+
+def test_stream_read_without_ijson(feed, feed_bytes, monkeypatch):
+    monkeypatch.setattr(feed_reader, "ijson", None)
+    assert read(feed_bytes, stream=True) == slim_feed(feed)
+
+
+def test_slim_feed_is_idempotent(feed):
+    slim = slim_feed(feed)
+    assert slim_feed(slim) == slim
+
+
+def test_selective_game_matches_full(feed, game):
+    assert describe(build_game(slim_feed(feed))) == describe(game)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_directory_source(tmp_path, stream):
+    feed = load_feed("nine_innings")
+    shutil.copy(f"{FIXTURE_DIR}/nine_innings.json", tmp_path / f"{feed['gamePk']}.json")
+    source = DirectorySource(str(tmp_path), selective=True, stream=stream)
+    assert source.get_feed(feed["gamePk"]) == slim_feed(feed)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_selective_cache_stores_slim_feeds(tmp_path, stream):
+    feed = load_feed("nine_innings")
+    feed["gameData"]["status"]["abstractGameState"] = "Final"
+    cache = FeedCache(str(tmp_path), selective=True, stream=stream)
+
+    cache.put(feed["gamePk"], feed)
+
+    with gzip.open(cache.get_path(feed["gamePk"], final=True), "rb") as f:
+        assert feed_reader.loads(f.read()) == slim_feed(feed)
+    assert cache.get(feed["gamePk"]) == slim_feed(feed)
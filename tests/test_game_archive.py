@@ -0,0 +1,114 @@
+import os
+import shutil
+
+import pytest
+
+from gd2score import game_archive
+from gd2score.draw_scorecard import DrawScorecard
+from gd2score.feed_source import DirectorySource
+from gd2score.player_registry import PlayerRegistry
+from gd2score.render import SeasonRenderer
+
+from conftest import FIXTURE_DIR, FIXTURE_NAMES, iter_atbats, load_feed
+
+
+def describe(game):
+    def runners(runners):
+        return [(r.id, r.start, r.end, r.event_num, r.out, r.to_score) for r in runners]
+
+    return (
+        [game.game_pk, game.date, game.in_progress, game.away, game.home, game.link],
+        {id: player.name for id, player in game.players.items()},
+        [(inning.num, [h.num for h in inning]) for inning in game],
+        [
+            (
+                atbat.pa_num,
+                atbat.event_num,
+                atbat.batter,
+                atbat.pitcher,
+                atbat.outs,
+                atbat.away_score,
+                atbat.home_score,
+                atbat.des,
+                atbat.event,
+                atbat.scoring,
+                runners(atbat.mid_pa_runners),
+                runners(atbat.runners),
+            )
+            for atbat in iter_atbats(game)
+        ],
+    )
+
+
+def test_round_trip(game):
+    loaded = game_archive.loads(game_archive.dumps(game))
+    assert describe(loaded) == describe(game)
+
+
+def test_round_trip_redraws_identically(game):
+    loaded = game_archive.loads(game_archive.dumps(game))
+    assert DrawScorecard().draw(loaded).tostring() == (
+        DrawScorecard().draw(game).tostring()
+    )
+
+
+def test_dumps_loads_dumps(game):
+    data = game_archive.dumps(game)
+    assert game_archive.dumps(game_archive.loads(data)) == data
+
+
+def test_save_and_load(tmp_path, game):
+    path = game_archive.get_archive_path(str(tmp_path), game.game_pk)
+    game_archive.save(game, path)
+    assert describe(game_archive.load(path)) == describe(game)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_players_from_registry(game):
+    data = game_archive.dumps(game)
+    registry = PlayerRegistry()
+    first = game_archive.loads(data, registry)
+    second = game_archive.loads(data, registry)
+    for id, player in first.players.items():
+        assert second.players[id] is player
+
+
+def test_bad_magic(game):
+    data = b"XXXX" + game_archive.dumps(game)[4:]
+    with pytest.raises(ValueError, match="Not a game archive"):
+        game_archive.loads(data)
+
+
+def test_unsupported_version(game):
+    data = bytearray(game_archive.dumps(game))
+    data[4:6] = (game_archive.FORMAT_VERSION + 1).to_bytes(2, "little")
+    with pytest.raises(ValueError, match="Unsupported"):
+        game_archive.loads(bytes(data))
+
+
+def test_redraw_matches_render(tmp_path):
+    feed_dir = tmp_path / "feeds"
+    feed_dir.mkdir()
+    game_ids = []
+    for name in FIXTURE_NAMES:
+        game_id = load_feed(name)["gamePk"]
+        shutil.copy(
+            os.path.join(FIXTURE_DIR, f"{name}.json"), feed_dir / f"{game_id}.json"
+        )
+        game_ids.append(game_id)
+    archive_dir = tmp_path / "archive"
+    archive_dir.mkdir()
+
+    SeasonRenderer(
+        DirectorySource(str(feed_dir), selective=True),
+        str(tmp_path / "rendered"),
+        archive_dir=str(archive_dir),
+    ).render_games(sorted(game_ids))
+    SeasonRenderer(
+        None, str(tmp_path / "redrawn"), archive_dir=str(archive_dir)
+    ).redraw()
+
+    for game_id in game_ids:
+        name = f"{game_id}.svg"
+        rendered = (tmp_path / "rendered" / name).read_bytes()
+        assert (tmp_path / "redrawn" / name).read_bytes() == rendered
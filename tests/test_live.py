@@ -0,0 +1,115 @@
+import copy
+
+import pytest
+
+from gd2score.draw_scorecard import DrawScorecard
+from gd2score.feed_source import MemorySource
+from gd2score.live import LiveGame, LiveScorecard
+
+from conftest import build_game, iter_atbats, load_feed
+
+
+class StandInSource(MemorySource):
+    """Serves a game's feed as it was at each step, with a new timecode for
+    each, the way the Stats API does while the game is on."""
+
+    def __init__(self, game_id, snapshots):
+        MemorySource.__init__(self, {})
+        self.game_id = game_id
+        self.snapshots = snapshots
+        self.step = -1
+
+    def advance(self):
+        self.step += 1
+        self.feeds[self.game_id] = copy.deepcopy(self.snapshots[self.step])
+
+    def get_timecodes(self, game_id):
+        return [str(step) for step in range(self.step + 1)]
+
+
+def get_snapshot(feed, play_count):
+    """The feed as it was while play play_count - 1 was under way."""
+    snapshot = copy.deepcopy(feed)
+    plays = snapshot["liveData"]["plays"]["allPlays"]
+    del plays[play_count:]
+    snapshot["gameData"]["status"]["abstractGameState"] = "Live"
+    plays[-1]["about"]["isComplete"] = False
+    return snapshot
+
+
+def rewrite_first_play(feed):
+    """The feed after a scoring change to its first, long finished, play."""
+    feed = copy.deepcopy(feed)
+    play = feed["liveData"]["plays"]["allPlays"][0]
+    play["result"]["description"] = "N. O'Neil flies out to center fielder Z. Guy."
+    return feed
+
+
+def describe(game):
+    return [
+        (
+            atbat.pa_num,
+            atbat.batter,
+            atbat.pitcher,
+            atbat.des,
+            atbat.scoring,
+            [(r.id, r.start, r.end, r.out, r.to_score) for r in atbat.runners],
+        )
+        for atbat in iter_atbats(game)
+    ]
+
+
+@pytest.fixture
+def full_feed():
+    return load_feed("nine_innings")
+
+
+def get_snapshots(full_feed):
+    play_count = len(full_feed["liveData"]["plays"]["allPlays"])
+    snapshots = [get_snapshot(full_feed, n) for n in range(1, play_count, 5)]
+    snapshots.append(full_feed)
+    snapshots.append(rewrite_first_play(full_feed))
+    return snapshots
+
+
+def test_updates_match_full_parse(full_feed):
+    source = StandInSource(full_feed["gamePk"], get_snapshots(full_feed))
+    live = LiveGame(full_feed["gamePk"], source)
+    scorecard = LiveScorecard()
+
+    for snapshot in source.snapshots:
+        source.advance()
+        live.poll()
+        game = build_game(copy.deepcopy(snapshot))
+        assert describe(live.game) == describe(game)
+        drawing = scorecard.draw(live.game).tostring()
+        assert drawing == DrawScorecard().draw(game).tostring()
+    assert not live.game.in_progress
+
+
+def test_rewritten_play_is_rebuilt(full_feed):
+    source = StandInSource(
+        full_feed["gamePk"], [full_feed, rewrite_first_play(full_feed)]
+    )
+    live = LiveGame(full_feed["gamePk"], source)
+    source.advance()
+    live.poll()
+    first_half = live.game.innings[0].halves[0]
+    second_half = live.game.innings[0].halves[1]
+
+    source.advance()
+    rebuilt = live.poll()
+
+    assert len(rebuilt) == 1
+    assert live.game.innings[0].halves[0] is not first_half
+    assert live.game.innings[0].halves[1] is second_half
+    assert live.game.innings[0].halves[0].atbats[0].scoring.code == "F8"
+
+
+def test_poll_without_new_timecode(full_feed):
+    source = StandInSource(full_feed["gamePk"], [full_feed])
+    live = LiveGame(full_feed["gamePk"], source)
+    source.advance()
+
+    assert live.poll()
+    assert live.poll() == []
@@ -0,0 +1,91 @@
+import logging
+
+import pytest
+
+from gd2score import svg
+from gd2score.logo_lookup import CODE
+from gd2score.logo_store import FALLBACK_ID, LogoStore, prefix_ids, split_logo
+
+# Two logos using the same ids, as exported logos often do
+NYY_LOGO = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+    '<defs><linearGradient id="a"/><clipPath id="b"/></defs>'
+    '<rect fill="url(#a)" clip-path="url(#b)"/><use xlink:href="#a"/></svg>'
+)
+BOS_LOGO = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="30">'
+    '<defs><linearGradient id="a"/></defs><circle fill="url(#a)"/></svg>'
+)
+
+
+def write_logo(directory, team, logo):
+    with open(directory / f"{CODE[team]}.svg", "w", encoding="utf-8") as f:
+        f.write(logo)
+
+
+def test_split_logo():
+    assert split_logo(BOS_LOGO) == (
+        "0 0 20 30",
+        '<defs><linearGradient id="a"/></defs><circle fill="url(#a)"/>',
+    )
+
+
+@pytest.mark.parametrize(
+    "logo", ["<svg><rect/></svg>", '<svg width="20"></svg>', "<html></html>"]
+)
+def test_split_logo_names_bad_logo(logo):
+    with pytest.raises(ValueError, match="bad.svg"):
+        split_logo(logo, "bad.svg")
+
+
+def test_prefix_ids():
+    markup = split_logo(NYY_LOGO)[1]
+    assert prefix_ids(markup, "nyy-") == (
+        '<defs><linearGradient id="nyy-a"/><clipPath id="nyy-b"/></defs>'
+        '<rect fill="url(#nyy-a)" clip-path="url(#nyy-b)"/>'
+        '<use xlink:href="#nyy-a"/>'
+    )
+
+
+def test_prefix_ids_keeps_outside_references():
+    markup = '<use href="#other"/><g id="a"/>'
+    assert prefix_ids(markup, "x-") == '<use href="#other"/><g id="x-a"/>'
+
+
+def test_symbols_have_distinct_ids(tmp_path):
+    write_logo(tmp_path, "nyy", NYY_LOGO)
+    write_logo(tmp_path, "bos", BOS_LOGO)
+    logos = LogoStore(str(tmp_path), "symbol")
+    dwg = svg.Drawing()
+
+    logos.add_defs(dwg, ("nyy", "bos"))
+
+    markup = dwg.tostring()
+    assert 'id="logo-nyy-a"' in markup
+    assert 'id="logo-bos-a"' in markup
+    assert 'id="a"' not in markup
+
+
+def test_bad_logo_uses_fallback(tmp_path, caplog):
+    write_logo(tmp_path, "nyy", "<svg><rect/></svg>")
+    logos = LogoStore(str(tmp_path), "symbol")
+
+    with caplog.at_level(logging.WARNING):
+        symbol = logos.get_symbol("nyy")
+
+    assert symbol.attribs["id"] == "logo-nyy"
+    assert symbol.attribs["viewBox"] == "0 0 40 40"
+    assert f"{CODE['nyy']}.svg" in caplog.text
+
+
+def test_bad_fallback_is_an_error(tmp_path):
+    fallback = tmp_path / "fallback.svg"
+    fallback.write_text("<svg><rect/></svg>", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="fallback.svg"):
+        LogoStore(str(tmp_path), "symbol", fallback=str(fallback))
+
+
+def test_missing_logo_uses_fallback_id(tmp_path):
+    logos = LogoStore(str(tmp_path), "symbol")
+    assert logos.get_symbol("nyy").attribs["id"] == FALLBACK_ID
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from gd2score.feed_reader import slim_feed
+from gd2score.feed_source import DirectorySource
+from gd2score.manifest import Manifest, hash_feed
+from gd2score.render import SeasonRenderer
+
+
+class FailingSource(DirectorySource):
+    """Stops the batch at one game, like a crash part way through."""
+
+    def __init__(self, directory, fail_game_id):
+        DirectorySource.__init__(self, directory, selective=True)
+        self.fail_game_id = fail_game_id
+
+    def get_feed(self, game_id):
+        if game_id == self.fail_game_id:
+            raise RuntimeError("Interrupted")
+        return DirectorySource.get_feed(self, game_id)
+
+
+@pytest.fixture
+def feed_dir(tmp_path, feeds):
+    directory = tmp_path / "feeds"
+    directory.mkdir()
+    for feed in feeds.values():
+        write_feed(directory, feed)
+    return directory
+
+
+def write_feed(directory, feed):
+    with open(directory / f"{feed['gamePk']}.json", "w", encoding="utf-8") as f:
+        json.dump(feed, f)
+
+
+def render(tmp_path, source, version="1"):
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"), version)
+    renderer = SeasonRenderer(source, str(tmp_path / "out"), manifest=manifest)
+    renderer.render_games(sorted(source.game_ids()))
+    return renderer
+
+
+def get_mtimes(tmp_path):
+    out = tmp_path / "out"
+    return {name: os.stat(out / name).st_mtime_ns for name in os.listdir(out)}
+
+
+def test_hash_feed_ignores_unused_fields(feed):
+    changed = json.loads(json.dumps(feed))
+    changed["liveData"]["boxscore"] = {}
+    changed["liveData"]["plays"]["allPlays"][0]["playEvents"][0]["pitchData"] = {}
+    assert hash_feed(changed) == hash_feed(feed)
+
+
+def test_hash_feed_same_for_slim_feed(feed):
+    assert hash_feed(slim_feed(feed)) == hash_feed(feed)
+
+
+def test_hash_feed_sees_play_changes(feed):
+    changed = json.loads(json.dumps(feed))
+    changed["liveData"]["plays"]["allPlays"][0]["result"]["description"] += " "
+    assert hash_feed(changed) != hash_feed(feed)
+
+
+def test_unchanged_games_are_skipped(tmp_path, feed_dir):
+    source = DirectorySource(str(feed_dir), selective=True)
+    assert render(tmp_path, source).unchanged == 0
+    mtimes = get_mtimes(tmp_path)
+
+    renderer = render(tmp_path, source)
+
+    assert renderer.unchanged == len(mtimes)
+    assert get_mtimes(tmp_path) == mtimes
+
+
+def test_changed_games_are_rendered(tmp_path, feed_dir, feeds):
+    source = DirectorySource(str(feed_dir), selective=True)
+    render(tmp_path, source)
+    changed_id, other_id, *_ = sorted(feeds)
+    feed = feeds[changed_id]
+    feed["liveData"]["plays"]["allPlays"][0]["result"]["description"] += " "
+    write_feed(feed_dir, feed)
+    os.remove(tmp_path / "out" / f"{other_id}.svg")
+
+    renderer = render(tmp_path, source)
+
+    assert renderer.unchanged == len(feeds) - 2
+    assert os.path.exists(tmp_path / "out" / f"{other_id}.svg")
+
+
+def test_new_version_renders_everything(tmp_path, feed_dir):
+    source = DirectorySource(str(feed_dir), selective=True)
+    render(tmp_path, source)
+    assert render(tmp_path, source, version="2").unchanged == 0
+
+
+def test_resumes_after_interruption(tmp_path, feed_dir, feeds):
+    game_ids = sorted(feeds)
+    with pytest.raises(RuntimeError):
+        render(tmp_path, FailingSource(str(feed_dir), game_ids[2]))
+    # A line cut short by the crash is ignored
+    with open(tmp_path / "manifest.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"game_id": ')
+
+    renderer = render(tmp_path, DirectorySource(str(feed_dir), selective=True))
+
+    assert renderer.unchanged == 2
+    assert sorted(os.listdir(tmp_path / "out")) == [
+        f"{game_id}.svg" for game_id in game_ids
+    ]
@@ -0,0 +1,136 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+
+import aiohttp
+import pytest
+
+from gd2score import scoring
+from gd2score.async_fetch import AsyncFeedFetcher
+from gd2score.atomic import atomic_write
+from gd2score.feed_source import HttpSource, MemorySource, get_feed_path
+from gd2score.quarantine import Quarantine
+from gd2score.render import SeasonRenderer
+
+from conftest import load_feed
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks",
+    "fixtures",
+    "nine_innings.json",
+)
+GAME_ID = 530000
+MISSING_GAME_ID = 999
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Serves the fixture feed and a 404 for anything else."""
+
+    def do_GET(self):
+        if self.path != get_feed_path(GAME_ID):
+            self.send_error(404)
+            return
+        with open(FIXTURE, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_renderer(base_url, tmp_path, quarantine=None):
+    return SeasonRenderer(
+        HttpSource(base_url, selective=True),
+        str(tmp_path / "out"),
+        cache_dir=str(tmp_path / "cache"),
+        fetcher=AsyncFeedFetcher(base_url, concurrency=2, retries=0),
+        quarantine=quarantine,
+    )
+
+
+def test_fetch_failure_is_quarantined(base_url, tmp_path):
+    quarantine = Quarantine(str(tmp_path / "quarantine"))
+    renderer = get_renderer(base_url, tmp_path, quarantine)
+
+    renderer.render_games([MISSING_GAME_ID, GAME_ID])
+
+    assert renderer.failed == [MISSING_GAME_ID]
+    assert MISSING_GAME_ID in quarantine
+    assert "404" in quarantine.get_traceback(MISSING_GAME_ID)
+    # There was no feed to keep, so there is nothing to replay
+    assert quarantine.game_ids() == []
+    assert os.path.exists(tmp_path / "out" / f"{GAME_ID}.svg")
+
+
+def test_fetch_failure_stops_batch_without_quarantine(base_url, tmp_path):
+    renderer = get_renderer(base_url, tmp_path)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        renderer.render_games([MISSING_GAME_ID, GAME_ID])
+
+
+def test_replay_renders_fixed_game(tmp_path, monkeypatch):
+    # Rules registered here are dropped after the test
+    monkeypatch.setattr(scoring, "EVENT_RULES", dict(scoring.EVENT_RULES))
+    monkeypatch.setattr(scoring, "_rules_by_event", {})
+    feed = load_feed("nine_innings")
+    feed["liveData"]["plays"]["allPlays"][0]["result"]["eventType"] = "new_event"
+    quarantine = Quarantine(str(tmp_path / "quarantine"))
+    out_dir = str(tmp_path / "out")
+
+    renderer = SeasonRenderer(
+        MemorySource({GAME_ID: feed}), out_dir, quarantine=quarantine
+    )
+    renderer.render_games([GAME_ID])
+
+    assert renderer.failed == [GAME_ID]
+    assert "New event type" in quarantine.get_traceback(GAME_ID)
+    assert quarantine.game_ids() == [GAME_ID]
+    assert not os.path.exists(tmp_path / "out" / f"{GAME_ID}.svg")
+
+    scoring.add_rule("new_event", scoring.score_field_out)
+    renderer = SeasonRenderer(
+        quarantine.source(selective=True), out_dir, quarantine=quarantine
+    )
+    renderer.render_games(quarantine.game_ids())
+
+    assert renderer.failed == []
+    assert GAME_ID not in quarantine
+    assert quarantine.game_ids() == []
+    assert os.path.exists(tmp_path / "out" / f"{GAME_ID}.svg")
+
+
+def test_failed_atomic_write_leaves_path_alone(tmp_path):
+    path = tmp_path / "scorecard.svg"
+    path.write_text("old", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path), "w", encoding="utf-8") as f:
+            f.write("new")
+            raise RuntimeError
+
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["scorecard.svg"]
+
+
+def test_atomic_write_open_error_is_not_masked(tmp_path):
+    with pytest.raises(FileNotFoundError) as error:
+        with atomic_write(str(tmp_path / "missing" / "scorecard.svg")):
+            pass
+    # The error from open() itself, not one from cleaning up after it
+    assert error.value.__context__ is None
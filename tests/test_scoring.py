@@ -0,0 +1,354 @@
+import json
+import os
+
+import pytest
+
+from gd2score.models import AtBat, Runner
+from gd2score.scoring import Scoring, add_rule, constant, get_scoring
+
+from conftest import DATA_DIR, build_game, iter_atbats, load_feed
+
+BATTER = 7
+
+# One case per branch of the if-chain that the rule table replaced, as
+# (event, description, outs, code, result), with the scoring it gave.
+CASES = [
+    ("strikeout", "Aaron Judge strikes out swinging.", 1, "K", "out"),
+    ("strikeout", "Aaron Judge strikes out on a foul tip.", 1, "K", "out"),
+    ("strikeout", "Aaron Judge called out on strikes.", 1, "Kl", "out"),
+    (
+        "strikeout_double_play",
+        "Aaron Judge strikes out swinging and Brett Gardner caught stealing 2nd.",
+        2,
+        "K",
+        "out",
+    ),
+    ("walk", "Aaron Judge walks.", 0, "W", "on-base"),
+    ("intent_walk", "Aaron Judge intentionally walks.", 0, "IW", "on-base"),
+    (
+        "catcher_interf",
+        "Aaron Judge reaches on catcher interference by catcher Christian Vazquez.",
+        0,
+        "CI",
+        "error",
+    ),
+    ("batter_interference", "Batter interference by Aaron Judge.", 1, "BI", "out"),
+    (
+        "grounded_into_double_play",
+        "Aaron Judge grounds into a double play, shortstop Xander Bogaerts to second baseman Ian Kinsler to first baseman Steve Pearce.",
+        2,
+        "G6",
+        "out",
+    ),
+    (
+        "force_out",
+        "Aaron Judge grounds into a force out, fielded by third baseman Rafael Devers.",
+        1,
+        "G5",
+        "fc",
+    ),
+    (
+        "force_out",
+        "Aaron Judge grounds into a force out, shortstop Xander Bogaerts to second baseman Ian Kinsler.",
+        1,
+        "G6",
+        "fc",
+    ),
+    (
+        "sac_fly",
+        "Aaron Judge out on a sacrifice fly to right fielder Mookie Betts.",
+        1,
+        "F9",
+        "out",
+    ),
+    (
+        "sac_fly",
+        "Aaron Judge hits a sacrifice fly.  Fielding error by left fielder Andrew Benintendi.",
+        0,
+        "E7",
+        "error",
+    ),
+    (
+        "sac_fly_double_play",
+        "Aaron Judge flies into a sacrifice double play, center fielder Jackie Bradley Jr. to catcher Christian Vazquez.",
+        2,
+        "F8",
+        "out",
+    ),
+    (
+        "sac_bunt_double_play",
+        "Aaron Judge pops into a sacrifice double play in foul territory, catcher Christian Vazquez to first baseman Steve Pearce.",
+        2,
+        "P2",
+        "out",
+    ),
+    (
+        "sac_bunt",
+        "Aaron Judge out on a sacrifice bunt, pitcher Chris Sale to first baseman Steve Pearce.",
+        1,
+        "B1",
+        "out",
+    ),
+    (
+        "sac_bunt",
+        "Aaron Judge hits a sacrifice bunt.  Throwing error by pitcher Chris Sale.",
+        0,
+        "SAC",
+        "out",
+    ),
+    (
+        "field_out",
+        "Aaron Judge flies out to center fielder Jackie Bradley Jr.",
+        1,
+        "F8",
+        "out",
+    ),
+    (
+        "field_out",
+        "Aaron Judge grounds out sharply, shortstop Xander Bogaerts to first baseman Steve Pearce.",
+        1,
+        "G6",
+        "out",
+    ),
+    (
+        "field_out",
+        "Aaron Judge lines out sharply to third baseman Rafael Devers.",
+        1,
+        "L5",
+        "out",
+    ),
+    ("field_out", "Aaron Judge pops out on a bunt.", 1, "P", "out"),
+    (
+        "field_out",
+        "Aaron Judge grounds out ,shortstop Xander Bogaerts to first baseman Steve Pearce.",
+        1,
+        "G6",
+        "out",
+    ),
+    (
+        "double_play",
+        "Aaron Judge lines into a double play, second baseman Ian Kinsler to first baseman Steve Pearce.",
+        2,
+        "L4",
+        "out",
+    ),
+    (
+        "double_play",
+        "Aaron Judge grounds into an unassisted double play, first baseman Steve Pearce.",
+        2,
+        "G3",
+        "out",
+    ),
+    (
+        "triple_play",
+        "Aaron Judge lines into a triple play, third baseman Rafael Devers to second baseman Ian Kinsler.",
+        3,
+        "L5",
+        "out",
+    ),
+    (
+        "double_play",
+        "Aaron Judge singles on a line drive.  Double play after a runner is hit by the batted ball.",
+        2,
+        "DP",
+        "out",
+    ),
+    (
+        "pickoff_caught_stealing_2b",
+        "Brett Gardner caught stealing 2nd base, pitcher Chris Sale to shortstop Xander Bogaerts.",
+        1,
+        "POCS",
+        "fc",
+    ),
+    ("pickoff_error_1b", "Pickoff error on Chris Sale.", 0, "PO", "error"),
+    (
+        "pickoff_1b",
+        "Brett Gardner picked off and caught stealing 2nd base.",
+        1,
+        "PO",
+        "fc",
+    ),
+    ("caught_stealing_home", "Brett Gardner caught stealing home.", 1, "CS", "fc"),
+    ("runner_double_play", "Brett Gardner doubled off first.", 2, "DP", "out"),
+    (
+        "double",
+        "Aaron Judge hits a ground-rule double (2) on a fly ball to left fielder Andrew Benintendi.",
+        0,
+        "F",
+        "on-base",
+    ),
+    (
+        "single",
+        "Aaron Judge singles on a ground ball to left fielder Andrew Benintendi.",
+        0,
+        "G7",
+        "on-base",
+    ),
+    ("single", "Aaron Judge singles on a sharp line drive.", 0, "S", "on-base"),
+    (
+        "single",
+        "Aaron Judge singles on a bunt pop up to pitcher Chris Sale.",
+        0,
+        "P1",
+        "on-base",
+    ),
+    ("double", "Aaron Judge doubles.", 0, "D", "on-base"),
+    ("double", "Aaron Judge doubles (10).", 0, "D", "on-base"),
+    ("single", "Aaron Judge reaches on an appeal play.", 0, "S", "on-base"),
+    (
+        "triple",
+        "Aaron Judge triples (1) on a fly ball to right fielder Mookie Betts.",
+        0,
+        "F9",
+        "on-base",
+    ),
+    ("triple", "Aaron Judge triples.", 0, "T", "on-base"),
+    (
+        "home_run",
+        "Aaron Judge homers (20) on a fly ball to left field.",
+        0,
+        "HR",
+        "on-base",
+    ),
+    ("hit_by_pitch", "Aaron Judge hit by pitch.", 0, "HB", "on-base"),
+    (
+        "field_error",
+        "Aaron Judge reaches on a fielding error by shortstop Xander Bogaerts.",
+        0,
+        "E6",
+        "error",
+    ),
+    (
+        "field_error",
+        "Aaron Judge reaches on a throwing error by third baseman Rafael Devers.",
+        0,
+        "E5",
+        "error",
+    ),
+    (
+        "field_error",
+        "Aaron Judge reaches on a missed catch error by first baseman Steve Pearce.",
+        0,
+        "E3",
+        "error",
+    ),
+    (
+        "fielders_choice_out",
+        "Aaron Judge reaches on a fielder's choice out, second baseman Ian Kinsler to shortstop Xander Bogaerts.",
+        1,
+        "FC4",
+        "fc",
+    ),
+    (
+        "fielders_choice_out",
+        "Aaron Judge reaches on a fielder's choice out, fielded by pitcher Chris Sale.",
+        1,
+        "FC1",
+        "fc",
+    ),
+    (
+        "fielders_choice",
+        "Aaron Judge reaches on a fielder's choice, fielded by catcher Christian Vazquez.",
+        0,
+        "FC2",
+        "fc",
+    ),
+    ("fielders_choice", "Aaron Judge reaches on a fielder's choice.", 0, "FC", "fc"),
+    ("fan_interference", "Aaron Judge out on fan interference.", 1, "FI", "out"),
+    ("fan_interference", "Aaron Judge out on fan interference.", 3, "FI", "out"),
+    ("wild_pitch", "Wild pitch by Chris Sale.", 0, "WP", "on-base"),
+    ("passed_ball", "Passed ball by Christian Vazquez.", 0, "PB", "on-base"),
+    ("Strikeout Double Play", "Aaron Judge strikes out.", 2, "K", "out"),
+    ("stolen_base_2b", "Brett Gardner steals (10) 2nd base.", 0, "", "out"),
+    ("other_out", "Brett Gardner out at home.", 1, "", "out"),
+    ("other_advance", "Brett Gardner advances to 2nd.", 0, "", "on-base"),
+    (
+        "defensive_switch",
+        "Defensive switch from left field to right field.",
+        0,
+        "DS",
+        "on-base",
+    ),
+    ("balk", "Chris Sale balks.", 0, "BK", "on-base"),
+    ("game_advisory", "Status Change - Delayed: Rain.", 0, "", "blank"),
+    (
+        "pitching_substitution",
+        "Pitching Change: Craig Kimbrel replaces Chris Sale.",
+        0,
+        "",
+        "blank",
+    ),
+    (
+        "offensive_substitution",
+        "Pinch-hitter Gary Sanchez replaces Aaron Judge.",
+        0,
+        "",
+        "blank",
+    ),
+    (
+        "defensive_substitution",
+        "Defensive Substitution: Eduardo Nunez replaces Ian Kinsler.",
+        0,
+        "",
+        "blank",
+    ),
+    ("runner_placed", "Brett Gardner placed on 2nd base.", 0, "", "blank"),
+    ("mound_visit", "Mound visit.", 0, "", "blank"),
+]
+
+
+def make_atbat(event, des, outs=0, runners=None):
+    return AtBat(1, 1, BATTER, des, event, 9, outs, runners=runners)
+
+
+@pytest.mark.parametrize("event, des, outs, code, result", CASES)
+def test_rules_match_old_scoring(event, des, outs, code, result):
+    assert get_scoring(make_atbat(event, des, outs)) == Scoring(code, result)
+
+
+def test_fixtures_match_old_scoring(fixture_name, game):
+    """The scoring of every at-bat in the fixtures, as the if-chain gave
+    it, is in data/fixture_scorings.json."""
+    with open(os.path.join(DATA_DIR, "fixture_scorings.json"), encoding="utf-8") as f:
+        expected = json.load(f)[fixture_name]
+    scorings = [
+        [atbat.pa_num, atbat.event, *get_scoring(atbat)] for atbat in iter_atbats(game)
+    ]
+    assert scorings == expected
+
+
+def test_fan_interference_with_batter_on_base():
+    atbat = make_atbat(
+        "fan_interference",
+        "Aaron Judge reaches on fan interference.",
+        runners=[Runner(BATTER, 0, 2, 1)],
+    )
+    assert get_scoring(atbat) == Scoring("FI", "on-base")
+
+
+def test_eager_scoring_ignores_later_runners():
+    atbat = make_atbat("fan_interference", "Aaron Judge reaches on fan interference.")
+    atbat.add_runner(Runner(BATTER, 0, 2, 1))
+    assert atbat.scoring == Scoring("FI", "out")
+
+
+def test_eager_prefix_rule():
+    with pytest.raises(ValueError):
+        add_rule("caught_stealing", constant("CS", "out"), prefix=True, eager=True)
+
+
+def test_new_event_type():
+    with pytest.raises(Exception, match="New event type"):
+        get_scoring(make_atbat("new_event", "Something new happens."))
+
+
+def test_parsing_error():
+    with pytest.raises(Exception, match="Parsing error"):
+        get_scoring(make_atbat("field_error", "Aaron Judge reaches on an error."))
+
+
+def test_build_fails_on_new_event_type():
+    feed = load_feed("nine_innings")
+    feed["liveData"]["plays"]["allPlays"][0]["result"]["eventType"] = "new_event"
+    with pytest.raises(Exception, match="New event type"):
+        build_game(feed)
@@ -0,0 +1,127 @@
+from datetime import date
+import os
+import pickle
+
+import pytest
+
+from gd2score import game_archive
+from gd2score.draw_scorecard import DrawScorecard
+from gd2score.render import SeasonRenderer
+from gd2score.season_archive import SeasonArchive, SeasonArchiveWriter, pack_directory
+
+from conftest import build_game, load_feed
+
+# The fixtures are all nyy at bos on one day, so each gets its own
+DATES = ["2018-10-01", "2018-10-02", "2018-10-02", "2018-10-04"]
+TEAMS = [("nyy", "bos"), ("bos", "nyy"), ("sea", "oak"), ("nyy", "tb")]
+NAMES = ["nine_innings", "rain_shortened", "extra_innings", "nineteen_innings"]
+
+
+@pytest.fixture
+def games():
+    games = {}
+    for name, day, (away, home) in zip(NAMES, DATES, TEAMS):
+        game = build_game(load_feed(name))
+        game.date, game.away, game.home = day, away, home
+        games[game.game_pk] = game
+    return games
+
+
+@pytest.fixture
+def archive_path(tmp_path, games):
+    path = str(tmp_path / "2018.gd2s")
+    with SeasonArchiveWriter(path) as writer:
+        for game in games.values():
+            writer.add(game)
+    return path
+
+
+def draw(game):
+    return DrawScorecard().draw(game).tostring()
+
+
+def test_load(archive_path, games):
+    with SeasonArchive(archive_path) as archive:
+        assert len(archive) == len(games)
+        assert sorted(archive.game_ids()) == sorted(games)
+        for game_pk, game in games.items():
+            assert game_pk in archive
+            loaded = archive.load(game_pk)
+            assert game_archive.dumps(loaded) == game_archive.dumps(game)
+            assert draw(loaded) == draw(game)
+        with pytest.raises(KeyError):
+            archive.load(1)
+
+
+def test_lookups(archive_path, games):
+    game_pks = list(games)
+    with SeasonArchive(archive_path) as archive:
+        assert archive.games_on("2018-10-02") == game_pks[1:3]
+        assert archive.games_on(date(2018, 10, 1)) == game_pks[:1]
+        assert archive.games_on("2018-10-03") == []
+        assert sorted(archive.games_between("2018-10-02", "2018-10-04")) == sorted(
+            game_pks[1:]
+        )
+        assert sorted(archive.games_for("nyy")) == sorted(
+            [game_pks[0], game_pks[1], game_pks[3]]
+        )
+        assert archive.games_for("oak") == game_pks[2:3]
+        assert archive.games_for("chc") == []
+
+
+def test_later_game_replaces_earlier(tmp_path, games):
+    path = str(tmp_path / "2018.gd2s")
+    first, second = list(games.values())[:2]
+    second.game_pk = first.game_pk
+    with SeasonArchiveWriter(path) as writer:
+        writer.add(first)
+        writer.add(second)
+    with SeasonArchive(path) as archive:
+        assert len(archive) == 1
+        assert draw(archive.load(first.game_pk)) == draw(second)
+
+
+def test_pickled_archive_reopens(archive_path, games):
+    with SeasonArchive(archive_path) as archive:
+        archive.load(next(iter(games)))
+        copy = pickle.loads(pickle.dumps(archive))
+    with copy:
+        for game_pk, game in games.items():
+            assert draw(copy.load(game_pk)) == draw(game)
+
+
+def test_failed_write_leaves_nothing(tmp_path, games):
+    path = str(tmp_path / "2018.gd2s")
+    with pytest.raises(RuntimeError):
+        with SeasonArchiveWriter(path) as writer:
+            writer.add(next(iter(games.values())))
+            raise RuntimeError
+    assert os.listdir(tmp_path) == []
+
+
+def test_not_a_season_archive(tmp_path, games):
+    path = tmp_path / "game.gd2g"
+    path.write_bytes(game_archive.dumps(next(iter(games.values()))))
+    with pytest.raises(ValueError, match="Not a season archive"):
+        SeasonArchive(str(path))
+
+
+def test_pack_directory_and_redraw(tmp_path, games):
+    archive_dir = tmp_path / "archive"
+    archive_dir.mkdir()
+    for game_pk, game in games.items():
+        game_archive.save(
+            game, game_archive.get_archive_path(str(archive_dir), game_pk)
+        )
+    path = str(tmp_path / "2018.gd2s")
+
+    assert pack_directory(str(archive_dir), path) == len(games)
+
+    SeasonRenderer(
+        None, str(tmp_path / "from_dir"), archive_dir=str(archive_dir)
+    ).redraw()
+    SeasonRenderer(None, str(tmp_path / "from_season"), archive_dir=path).redraw()
+    for game_pk in games:
+        name = f"{game_pk}.svg"
+        expected = (tmp_path / "from_dir" / name).read_bytes()
+        assert (tmp_path / "from_season" / name).read_bytes() == expected